@@ -0,0 +1,25 @@
+from emotiongraph import collect_emotions, finish_emotional_graph
+from metaphorgraph import collect_metaphors, finish_metaphor_graph
+from nlp import get_nlp
+from relationshipgraph import collect_relationships, finish_relationship_graph
+
+def build_all_graphs(journal_entries):
+    """Build the emotional, metaphor and relationship graphs in one pass.
+
+    Each entry is parsed once and the Doc is shared by all three extractors,
+    so preprocess_journal's generator can be consumed directly.
+    """
+    emotional = ({}, {})
+    metaphor = ([], [])
+    relationship = ([], [], [], [])
+
+    nlp = get_nlp()
+    for entry in journal_entries:
+        doc = nlp(entry.text)  # single parse per entry
+        collect_emotions(entry, doc, *emotional)
+        collect_metaphors(entry, doc, *metaphor)
+        collect_relationships(entry, doc, *relationship)
+
+    return (finish_emotional_graph(*emotional),
+            finish_metaphor_graph(*metaphor),
+            finish_relationship_graph(*relationship))
\ No newline at end of file
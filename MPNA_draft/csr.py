@@ -0,0 +1,20 @@
+from array import array
+
+import networkx as nx
+import numpy as np
+
+def to_csr(G):
+    """Snapshot G's adjacency as a float32 CSR matrix.
+
+    Stores (A, nodes) in G.graph['csr'], where row/column i of A is nodes[i],
+    so scipy.sparse.csgraph routines can run on it directly. The snapshot is
+    not updated if G changes afterwards; call to_csr again.
+    """
+    nodes = list(G.nodes())
+    A = nx.to_scipy_sparse_array(G, nodelist=nodes, format='csr', dtype=np.float32, weight=None)
+    G.graph['csr'] = (A, nodes)
+    return A, nodes
+
+def id_array(ids):
+    """Pack entry ids into a compact int32 buffer for node and edge attributes."""
+    return array('i', ids)
@@ -1,51 +1,79 @@
-def build_emotional_graph(journal_entries):
-    G = nx.DiGraph()
-    
-    for entry in journal_entries:
-        # Extract emotions and their triggers/targets
-        emotions = extract_emotions(entry.text)
-        
-        for emotion in emotions:
-            # Add emotion node if it doesn't exist
-            if not G.has_node(emotion.name):
-                G.add_node(emotion.name, type="emotion",
-                          valence=emotion.valence,
-                          arousal=emotion.arousal,
-                          first_seen=entry.date,
-                          entries=[entry.id])
+from csr import id_array, to_csr
+from nlp import get_nlp
+from prep import context_window
+
+def collect_emotions(entry, doc, nodes, edges):
+    # Extract emotions and their triggers/targets
+    emotions = extract_emotions(doc)
+
+    for emotion in emotions:
+        # One context per emotion, shared by its trigger and response edges;
+        # skipped entirely when neither edge exists
+        if emotion.trigger or emotion.response:
+            start, end = context_window(entry.token_offsets, emotion.char_pos, len(entry.text))
+            context = entry.text[start:end]
+
+        # Add emotion node if it doesn't exist
+        node = nodes.get(emotion.name)
+        if node is None:
+            nodes[emotion.name] = {"type": "emotion",
+                                   "valence": emotion.valence,
+                                   "arousal": emotion.arousal,
+                                   "first_seen": entry.date,
+                                   "entries": id_array([entry.id])}
+        else:
+            node["entries"].append(entry.id)
+
+        # Link emotion to triggers
+        if emotion.trigger:
+            if emotion.trigger not in nodes:
+                nodes[emotion.trigger] = {"type": "emotion_trigger",
+                                          "entries": id_array([entry.id])}
+
+            edge = edges.get((emotion.trigger, emotion.name))
+            if edge is None:
+                edges[emotion.trigger, emotion.name] = {"type": "triggers",
+                                                        "contexts": [context],
+                                                        "entries": id_array([entry.id])}
+            else:
+                edge["contexts"].append(context)
+                edge["entries"].append(entry.id)
+
+        # Link emotion to responses
+        if emotion.response:
+            if emotion.response not in nodes:
+                nodes[emotion.response] = {"type": "emotion_response",
+                                           "entries": id_array([entry.id])}
+
+            edge = edges.get((emotion.name, emotion.response))
+            if edge is None:
+                edges[emotion.name, emotion.response] = {"type": "leads_to",
+                                                         "contexts": [context],
+                                                         "entries": id_array([entry.id])}
             else:
-                G.nodes[emotion.name]["entries"].append(entry.id)
-            
-            # Link emotion to triggers
-            if emotion.trigger:
-                if not G.has_node(emotion.trigger):
-                    G.add_node(emotion.trigger, type="emotion_trigger",
-                              entries=[entry.id])
-                
-                if not G.has_edge(emotion.trigger, emotion.name):
-                    G.add_edge(emotion.trigger, emotion.name, 
-                              type="triggers",
-                              contexts=[extract_context(entry.text, emotion)],
-                              entries=[entry.id])
-                else:
-                    edge = G.edges[emotion.trigger, emotion.name]
-                    edge["contexts"].append(extract_context(entry.text, emotion))
-                    edge["entries"].append(entry.id)
-            
-            # Link emotion to responses
-            if emotion.response:
-                if not G.has_node(emotion.response):
-                    G.add_node(emotion.response, type="emotion_response",
-                              entries=[entry.id])
-                
-                if not G.has_edge(emotion.name, emotion.response):
-                    G.add_edge(emotion.name, emotion.response,
-                              type="leads_to",
-                              contexts=[extract_context(entry.text, emotion)],
-                              entries=[entry.id])
-                else:
-                    edge = G.edges[emotion.name, emotion.response]
-                    edge["contexts"].append(extract_context(entry.text, emotion))
-                    edge["entries"].append(entry.id)
-    
+                edge["contexts"].append(context)
+                edge["entries"].append(entry.id)
+
+def finish_emotional_graph(nodes, edges):
+    G = nx.DiGraph()
+
+    # Materialize into NetworkX in bulk
+    G.add_nodes_from(nodes.items())
+    G.add_edges_from((u, v, attrs) for (u, v), attrs in edges.items())
+
+    # Cache CSR adjacency for downstream csgraph analytics
+    to_csr(G)
+
     return G
+
+def build_emotional_graph(journal_entries):
+    # Accumulate attributes in plain dicts keyed by node name and (u, v);
+    # membership tests stay on local hash tables and NetworkX is only
+    # touched once, at the end. Entry ids go into array('i') buffers,
+    # 4 bytes each instead of a list slot plus an int object
+    nodes = {}
+    edges = {}
+    nlp = get_nlp()
+    for entry in journal_entries:
+        collect_emotions(entry, nlp(entry.text), nodes, edges)
+    return finish_emotional_graph(nodes, edges)
\ No newline at end of file
@@ -1,4 +1,28 @@
-def integrate_graphs(graphs):
+from array import array
+
+import hnswlib
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+from csr import to_csr
+
+def _embed_nodes(integrated):
+    # Stack one embedding per node into an (N, d) matrix with unit-length rows
+    nodes = list(integrated.nodes())
+    E = np.stack([node_embedding(n, integrated) for n in nodes]).astype(np.float32)
+    # Zero embeddings stay zero rather than dividing into NaN, which hnswlib can't index
+    E /= np.maximum(np.linalg.norm(E, axis=1, keepdims=True), np.finfo(np.float32).eps)
+    return nodes, E
+
+def _build_index(vectors, ids):
+    # Cosine HNSW index over one partition, labelled with global node ids
+    index = hnswlib.Index(space='cosine', dim=vectors.shape[1])
+    index.init_index(max_elements=len(ids), ef_construction=200, M=16)
+    index.add_items(vectors, ids=ids)
+    index.set_ef(50)
+    return index
+
+def integrate_graphs(graphs, max_semantic_edges=5):
     # Create a merged graph
     integrated = nx.MultiDiGraph()
     
@@ -14,7 +38,7 @@ def integrate_graphs(graphs):
                 # Merge node attributes
                 for key, value in data.items():
                     if key in integrated.nodes[node]:
-                        if isinstance(value, list):
+                        if isinstance(value, (list, array)):
                             integrated.nodes[node][key].extend(value)
                         else:
                             # For non-list values, keep most recent
@@ -31,15 +55,54 @@ def integrate_graphs(graphs):
     
     # Create cross-references between graphs
     # Link identical entities across graphs
-    nodes = list(integrated.nodes())
-    for i, node1 in enumerate(nodes):
-        for node2 in nodes[i+1:]:
-            # If nodes appear in different graphs and are similar
-            if (set(integrated.nodes[node1]["sources"]) != 
-                set(integrated.nodes[node2]["sources"]) and
-                calculate_node_similarity(node1, node2, integrated) > 0.8):
+    nodes, E = _embed_nodes(integrated)
+    
+    # Partition nodes by their source set: pairs inside a partition share
+    # sources and can never cross-reference, so they are never scored
+    groups = {}
+    for i, node in enumerate(nodes):
+        groups.setdefault(frozenset(integrated.nodes[node]["sources"]), []).append(i)
+    groups = [np.asarray(ids) for ids in groups.values()]
+    indices = [_build_index(E[ids], ids) for ids in groups]
+    
+    # Approximate nearest neighbours keep cross-references sparse: each
+    # node's candidates from every other partition are pooled and only its
+    # max_semantic_edges most similar are linked, instead of all pairs
+    linked = set()
+    for a, ids_a in enumerate(groups):
+        cand_labels, cand_dists = [], []
+        for b, index in enumerate(indices):
+            if a == b:
+                continue
+            k = min(max_semantic_edges, len(groups[b]))
+            labels, dists = index.knn_query(E[ids_a], k=k)
+            cand_labels.append(labels)
+            cand_dists.append(dists)
+        if not cand_labels:
+            continue
+        cand_labels = np.hstack(cand_labels)
+        cand_dists = np.hstack(cand_dists)
+        # Per row, the max_semantic_edges nearest candidates across partitions
+        top = np.argsort(cand_dists, axis=1, kind='stable')[:, :max_semantic_edges]
+        top_labels = np.take_along_axis(cand_labels, top, axis=1)
+        top_dists = np.take_along_axis(cand_dists, top, axis=1)
+        for i, row_labels, row_dists in zip(ids_a.tolist(), top_labels.tolist(), top_dists.tolist()):
+            for j, dist in zip(row_labels, row_dists):
+                # Skip pairs already linked from the other side
+                pair = (min(i, j), max(i, j))
+                similarity = 1.0 - dist
+                if pair in linked or similarity <= 0.8:
+                    continue
                 
-                integrated.add_edge(node1, node2, type="cross_reference",
-                                   similarity=calculate_node_similarity(node1, node2, integrated))
+                linked.add(pair)
+                integrated.add_edge(nodes[i], nodes[j], type="cross_reference",
+                                   similarity=similarity)
+    
+    # Weakly connected components on the CSR adjacency instead of
+    # walking NetworkX neighbour dicts
+    A, csr_nodes = to_csr(integrated)
+    n_components, labels = connected_components(A, directed=True, connection='weak')
+    integrated.graph['components'] = dict(zip(csr_nodes, labels.tolist()))
+    integrated.graph['n_components'] = n_components
     
-    return integrated
+    return integrated
\ No newline at end of file
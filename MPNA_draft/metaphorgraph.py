@@ -1,36 +1,65 @@
-def build_metaphor_graph(journal_entries):
+import functools
+
+import pandas as pd
+
+from csr import id_array, to_csr
+from nlp import get_nlp
+
+@functools.lru_cache(maxsize=4096)
+def _classify_domain(source):
+    # Concrete domains (body, water, weather...) recur across entries and journals
+    return classify_domain(source)
+
+def collect_metaphors(entry, doc, node_rows, edge_rows):
+    # Extract metaphors and their targets
+    metaphors = extract_metaphors(doc)
+    for metaphor in metaphors:
+        source = metaphor.source  # The concrete domain
+        target = metaphor.target  # The abstract concept
+
+        node_rows.append((source, "metaphor_source", entry.id))
+        node_rows.append((target, "metaphor_target", entry.id))
+
+        # Undirected graph, so (source, target) and (target, source)
+        # share one edge
+        u, v = sorted((source, target))
+        edge_rows.append((u, v, entry.date,
+                          extract_context(entry.text, metaphor), entry.id))
+
+def finish_metaphor_graph(node_rows, edge_rows):
     G = nx.Graph()
-    
+
+    # Second pass: group occurrences and bulk-insert
+    nodes = pd.DataFrame(node_rows, columns=["name", "type", "entry_id"])
+    entries = nodes.groupby("name", sort=False)["entry_id"].agg(id_array)
+
+    node_attrs = []
+    for row in nodes.drop_duplicates("name").itertuples(index=False):
+        attrs = {"type": row.type}
+        if row.type == "metaphor_source":
+            attrs["domain"] = _classify_domain(row.name)
+        attrs["entries"] = entries[row.name]
+        node_attrs.append((row.name, attrs))
+    G.add_nodes_from(node_attrs)
+
+    edges = pd.DataFrame(edge_rows, columns=["u", "v", "first_seen", "context", "entry_id"])
+    grouped = edges.groupby(["u", "v"], sort=False).agg(
+        first_seen=("first_seen", "first"),
+        contexts=("context", list),
+        entries=("entry_id", id_array))
+    grouped.insert(0, "type", "metaphorical_mapping")
+    G.add_edges_from((u, v, attrs) for (u, v), attrs in grouped.to_dict("index").items())
+
+    # Cache CSR adjacency for downstream csgraph analytics
+    to_csr(G)
+
+    return G
+
+def build_metaphor_graph(journal_entries):
+    # First pass: collect every occurrence into flat columns
+    node_rows = []  # (name, type, entry_id)
+    edge_rows = []  # (u, v, first_seen, context, entry_id)
+    nlp = get_nlp()
     for entry in journal_entries:
-        # Extract metaphors and their targets
-        metaphors = extract_metaphors(entry.text)
-        for metaphor in metaphors:
-            source = metaphor.source  # The concrete domain
-            target = metaphor.target  # The abstract concept
-            
-            # Add nodes if they don't exist
-            if not G.has_node(source):
-                G.add_node(source, type="metaphor_source", 
-                          domain=classify_domain(source),
-                          entries=[entry.id])
-            else:
-                G.nodes[source]["entries"].append(entry.id)
-                
-            if not G.has_node(target):
-                G.add_node(target, type="metaphor_target",
-                          entries=[entry.id])
-            else:
-                G.nodes[target]["entries"].append(entry.id)
-            
-            # Add edge between source and target
-            if not G.has_edge(source, target):
-                G.add_edge(source, target, type="metaphorical_mapping",
-                          first_seen=entry.date,
-                          contexts=[extract_context(entry.text, metaphor)],
-                          entries=[entry.id])
-            else:
-                edge = G.edges[source, target]
-                edge["contexts"].append(extract_context(entry.text, metaphor))
-                edge["entries"].append(entry.id)
-    
-    return G
\ No newline at end of file
+        collect_metaphors(entry, nlp(entry.text), node_rows, edge_rows)
+    return finish_metaphor_graph(node_rows, edge_rows)
\ No newline at end of file
@@ -0,0 +1,9 @@
+from functools import lru_cache
+
+import spacy
+
+@lru_cache(maxsize=1)
+def get_nlp():
+    """The spaCy pipeline every graph builder parses entries with, loaded on first use."""
+    # Full pipeline: the relationship extractor needs NER
+    return spacy.load("en_core_web_sm")
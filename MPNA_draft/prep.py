@@ -1,21 +1,100 @@
+import re
+from types import SimpleNamespace
+
+import hyperscan
+import numpy as np
+from numba import njit
+
+_TOKEN_RE = re.compile(r'\S+')
+
+# Date headers at the start of a line: ISO, US numeric, dotted (9.22.14)
+# and long-form (September 22, 2014)
+_DATE_EXPRESSIONS = [
+    rb'^\s*\d{4}-\d{1,2}-\d{1,2}',
+    rb'^\s*\d{1,2}/\d{1,2}/\d{2,4}',
+    rb'^\s*\d{1,2}\.\d{1,2}\.\d{2,4}',
+    rb'^\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}',
+]
+
+# Compiled once: every pattern is matched in a single pass over the text
+_DATE_DB = hyperscan.Database()
+_DATE_DB.compile(
+    expressions=_DATE_EXPRESSIONS,
+    ids=list(range(len(_DATE_EXPRESSIONS))),
+    elements=len(_DATE_EXPRESSIONS),
+    flags=[hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_MULTILINE
+           | hyperscan.HS_FLAG_CASELESS] * len(_DATE_EXPRESSIONS),
+)
+
+def segment_by_dates(journal_text):
+    """Split the journal at date headers. Returns [] if no date header is found."""
+    data = journal_text.encode('utf-8')
+    matches = []
+
+    def on_match(pattern_id, start, end, flags, context):
+        matches.append((start, end))
+
+    _DATE_DB.scan(data, match_event_handler=on_match)
+    if not matches:
+        return []
+
+    # Hyperscan reports every end offset; keep one match per header
+    starts = []
+    last_end = -1
+    for start, end in sorted(matches):
+        if start >= last_end:
+            starts.append(start)
+        last_end = max(last_end, end)
+
+    # Offsets are byte positions, so slice the encoded text
+    starts.append(len(data))
+    return [SimpleNamespace(text=data[a:b].decode('utf-8').strip())
+            for a, b in zip(starts, starts[1:])]
+
+@njit(cache=True)
+def context_window(offsets, target_pos, text_len, window=50):
+    """Return (start_char, end_char) spanning `window` tokens either side of target_pos."""
+    n = offsets.shape[0]
+    if n == 0:
+        return 0, text_len
+    # Index of the token that contains target_pos
+    idx = np.searchsorted(offsets, target_pos, side='right') - 1
+    if idx < 0:
+        idx = 0
+    start = max(idx - window, 0)
+    end = idx + window + 1
+    if end >= n:
+        return offsets[start], text_len
+    return offsets[start], offsets[end]
+
 def preprocess_journal(journal_text):
+    """Yield enriched entries one at a time.
+
+    Segmentation only holds raw text, so it runs up front to give every
+    entry its relative position; the NLP enrichment happens lazily as each
+    entry is consumed. The result can be iterated once.
+    """
     # Segment by entries if dates are available
-    if contains_date_patterns(journal_text):
-        entries = segment_by_dates(journal_text)
-    else:
+    entries = segment_by_dates(journal_text)
+    if not entries:
         # Otherwise use semantic chunking
         entries = chunk_by_semantic_boundaries(journal_text, target_size=2000)
     
     # Enrich entries with metadata
+    total = len(entries)
     for i, entry in enumerate(entries):
         # Extract temporal information
         entry.date = extract_date(entry.text)
-        entry.relative_position = i / len(entries)  # 0-1 timeline position
+        entry.relative_position = i / total  # 0-1 timeline position
         
         # Add basic NLP analysis
         entry.tokens = tokenize(entry.text)
+        entry.token_offsets = np.fromiter((m.start() for m in _TOKEN_RE.finditer(entry.text)),
+                                          dtype=np.int32)
         entry.entities = extract_entities(entry.text)
         entry.sentiment = analyze_sentiment(entry.text)
         entry.topics = extract_topics(entry.text, num_topics=5)
-    
-    return entries
\ No newline at end of file
+        
+        yield entry
+        # Drop the reference so consumed entries can be freed
+        entries[i] = None
\ No newline at end of file
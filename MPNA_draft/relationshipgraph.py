@@ -1,43 +1,126 @@
-def build_relationship_graph(journal_entries):
-    G = nx.DiGraph()
-    
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from csr import id_array, to_csr
+from nlp import get_nlp
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+SENTIMENT_BATCH_SIZE = 64
+QUANTIZED_MODEL_DIR = Path(__file__).parent / "models" / "relationship-sentiment-int8"
+
+def _load_quantized_sentiment_model():
+    """Load the int8 ONNX sentiment model, exporting and quantizing it on first use."""
+    if not QUANTIZED_MODEL_DIR.exists():
+        onnx_model = ORTModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL, export=True)
+        quantizer = ORTQuantizer.from_pretrained(onnx_model)
+        # Dynamic int8 quantization targeting AVX512-VNNI dot-product instructions
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=QUANTIZED_MODEL_DIR, quantization_config=qconfig)
+    return ORTModelForSequenceClassification.from_pretrained(QUANTIZED_MODEL_DIR,
+                                                             file_name="model_quantized.onnx")
+
+@lru_cache(maxsize=1)
+def _sentiment_model():
+    """Load (tokenizer, model, device) on first use: int8 ONNX Runtime on CPU,
+    bf16 PyTorch on GPU. Deferred so importing this module never downloads or
+    quantizes a model."""
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+    if device == "cuda":
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.bfloat16).to(device).eval()
+    else:
+        model = _load_quantized_sentiment_model()
+    return tokenizer, model, device
+
+def extract_relationship_sentiments(samples, batch_size=SENTIMENT_BATCH_SIZE):
+    """Score every (text, person) pair in batches; returns one {label: prob} dict per pair."""
+    if not samples:
+        return []
+    sentiment_tokenizer, sentiment_model, device = _sentiment_model()
+    probs = []
+    with torch.inference_mode():
+        for i in range(0, len(samples), batch_size):
+            batch = samples[i:i + batch_size]
+            # Encode the person as the second segment so the score is about them
+            inputs = sentiment_tokenizer([text for text, _ in batch],
+                                         [person for _, person in batch],
+                                         padding=True, truncation="only_first",
+                                         return_tensors="pt").to(device)
+            logits = sentiment_model(**inputs).logits
+            probs.append(logits.float().softmax(-1).cpu().numpy())
+    labels = [sentiment_model.config.id2label[i] for i in range(sentiment_model.config.num_labels)]
+    return [dict(zip(labels, row.tolist())) for row in np.concatenate(probs)]
+
+def collect_relationships(entry, doc, person_rows, self_rows, samples, described_rows):
     # Extract people mentioned
+    people = extract_people(doc)
+    for person in people:
+        person_rows.append((person, entry.date, entry.id))
+
+        # Extract relationship between writer and person
+        interactions = extract_interactions(entry.text, person)
+        self_rows.append((person, entry.date, interactions, entry.id))
+        samples.append((entry.text, person))
+
+        # Add relationships between mentioned people
+        other_people = [p for p in people if p != person]
+        for other in other_people:
+            rel = extract_described_relationship(entry.text, person, other)
+            if rel:
+                described_rows.append((person, other, rel, entry.id))
+
+def finish_relationship_graph(person_rows, self_rows, samples, described_rows):
+    G = nx.DiGraph()
+
+    # Second pass: group occurrences and bulk-insert
+    persons = pd.DataFrame(person_rows, columns=["person", "first_mention", "entry_id"])
+    grouped = persons.groupby("person", sort=False).agg(
+        first_mention=("first_mention", "first"),
+        mentions=("entry_id", "size"),
+        entries=("entry_id", id_array))
+    grouped.insert(0, "type", "person")
+    G.add_nodes_from(grouped.to_dict("index").items())
+
+    # Relationship edges with the writer
+    self_edges = pd.DataFrame(self_rows, columns=["person", "first_mention",
+                                                  "interactions", "entry_id"])
+    self_edges["sentiments"] = extract_relationship_sentiments(samples)
+    grouped = self_edges.groupby("person", sort=False).agg(
+        first_mention=("first_mention", "first"),
+        sentiments=("sentiments", list),
+        interactions=("interactions", list),
+        entries=("entry_id", id_array))
+    grouped.insert(0, "type", "relationship")
+    G.add_edges_from(("SELF", person, attrs) for person, attrs in grouped.to_dict("index").items())
+
+    # Relationships between mentioned people
+    described = pd.DataFrame(described_rows, columns=["person", "other", "description", "entry_id"])
+    grouped = described.groupby(["person", "other"], sort=False).agg(
+        description=("description", "first"),
+        entries=("entry_id", id_array))
+    grouped.insert(0, "type", "described_relationship")
+    G.add_edges_from((u, v, attrs) for (u, v), attrs in grouped.to_dict("index").items())
+
+    # Cache CSR adjacency for downstream csgraph analytics
+    to_csr(G)
+
+    return G
+
+def build_relationship_graph(journal_entries):
+    # First pass: collect every occurrence into flat columns
+    person_rows = []     # (person, first_mention, entry_id)
+    self_rows = []       # (person, first_mention, interactions, entry_id)
+    samples = []         # (text, person), scored in batches after the loop
+    described_rows = []  # (person, other, description, entry_id)
+    nlp = get_nlp()
     for entry in journal_entries:
-        people = extract_people(entry.text)
-        for person in people:
-            # Create or update person node
-            if not G.has_node(person):
-                G.add_node(person, type="person", first_mention=entry.date, 
-                          mentions=1, entries=[entry.id])
-            else:
-                G.nodes[person]["mentions"] += 1
-                G.nodes[person]["entries"].append(entry.id)
-                
-            # Extract relationship between writer and person
-            sentiments = extract_relationship_sentiment(entry.text, person)
-            interactions = extract_interactions(entry.text, person)
-            
-            # Add relationship edge with writer
-            if not G.has_edge("SELF", person):
-                G.add_edge("SELF", person, type="relationship", 
-                          first_mention=entry.date,
-                          sentiments=[sentiments],
-                          interactions=[interactions],
-                          entries=[entry.id])
-            else:
-                edge = G.edges["SELF", person]
-                edge["sentiments"].append(sentiments)
-                edge["interactions"].append(interactions)
-                edge["entries"].append(entry.id)
-            
-            # Add relationships between mentioned people
-            other_people = [p for p in people if p != person]
-            for other in other_people:
-                rel = extract_described_relationship(entry.text, person, other)
-                if rel and not G.has_edge(person, other):
-                    G.add_edge(person, other, type="described_relationship",
-                              description=rel, entries=[entry.id])
-                elif rel:
-                    G.edges[person, other]["entries"].append(entry.id)
-    
-    return G
\ No newline at end of file
+        collect_relationships(entry, nlp(entry.text), person_rows, self_rows, samples, described_rows)
+    return finish_relationship_graph(person_rows, self_rows, samples, described_rows)
\ No newline at end of file
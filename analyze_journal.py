@@ -1,5 +1,5 @@
-from journal_analyzer.main import setup_database, batch_process_entries
-from journal_analyzer.temporal_analyzer import analyze_with_context
+# journal_analyzer.main and temporal_analyzer pull in the LLM clients; they are
+# imported inside analyze_journal so --list-tables/--show-table start fast
 from journal_analyzer.database_manager import create_tables, get_db_connection
 from journal_analyzer.config import CURRENT_LLM_BACKEND, DEFAULT_LLM_BACKEND, DEFAULT_LLM_MODEL, CLI_SELECTED_MODEL
 from pathlib import Path
@@ -25,19 +25,24 @@ def print_db_contents(table_name: str = None):
                 print(f"- {table[0]}")
             return
 
-        # Get column names
-        cursor.execute(f"PRAGMA table_info({table_name});")
-        columns = [col[1] for col in cursor.fetchall()]
+        # Identifiers can't be bound as parameters, so only interpolate
+        # names that exist in sqlite_master, quoted
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        valid = {row[0] for row in cursor.fetchall()}
+        if table_name not in valid:
+            raise ValueError(f"Unknown table: {table_name}")
         
-        # Get data
-        cursor.execute(f"SELECT * FROM {table_name};")
-        rows = cursor.fetchall()
+        # Get data; column names come from the cursor description
+        cursor.execute(f'SELECT * FROM "{table_name}";')
+        columns = [col[0] for col in cursor.description]
         
         print(f"\nContents of {table_name}:")
         print("Columns:", columns)
         print("\nRows:")
-        for row in rows:
-            print(dict(zip(columns, row)))
+        # Stream in chunks so large tables aren't loaded into memory at once
+        while rows := cursor.fetchmany(1000):
+            for row in rows:
+                print(dict(zip(columns, row)))
             
     except Exception as e:
         print(f"Error accessing database: {e}")
@@ -103,6 +108,9 @@ def analyze_journal(journal_path: str = None, query: str = None):
     else:
         logging.info(f"Using default model: {DEFAULT_LLM_MODEL}")
 
+    from journal_analyzer.main import setup_database, batch_process_entries
+    from journal_analyzer.temporal_analyzer import analyze_with_context
+
     # Setup and load journal if needed
     setup_database()
     if args.reload:
@@ -118,6 +126,7 @@ def analyze_journal(journal_path: str = None, query: str = None):
     return result
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     # Example usage
     result = analyze_journal(
         journal_path='data/"Journal first 725 anon.txt"',  # Remove hardcoded path
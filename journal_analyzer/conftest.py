@@ -0,0 +1,33 @@
+import sys
+import types
+
+import pytest
+
+from journal_analyzer.pool import SQLiteConnectionPool
+
+# config.py holds each checkout's paths and keys and isn't tracked; the
+# package is imported against this stand-in so tests never touch a real
+# database or need one to exist
+_config = types.ModuleType('journal_analyzer.config')
+_config.DB_PATH = ':memory:'  # Replaced per test by the db fixture
+_config.DEFAULT_LLM_MODEL = {'lambda': 'test-model', 'ollama': 'test-model'}
+_config.OLLAMA_BASE_URL = 'http://localhost:11434'
+_config.CURRENT_LLM_BACKEND = 'lambda'
+_config.CLI_SELECTED_MODEL = None
+sys.modules['journal_analyzer.config'] = _config
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """database_manager pointed at a fresh database file under tmp_path."""
+    from journal_analyzer import database_manager
+
+    monkeypatch.setattr(database_manager, 'DB_PATH', tmp_path / 'journal.db')
+    pool = SQLiteConnectionPool(database_manager.get_db_connection)
+    read_pool = SQLiteConnectionPool(database_manager.get_db_reader_connection)
+    monkeypatch.setattr(database_manager, '_pool', pool)
+    monkeypatch.setattr(database_manager, '_read_pool', read_pool)
+    monkeypatch.setattr(database_manager, '_legacy_entries', None)
+    database_manager.create_tables()
+    yield database_manager
+    pool.close_all()
+    read_pool.close_all()
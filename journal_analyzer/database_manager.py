@@ -1,231 +1,540 @@
+import atexit
 import sqlite3
 from pathlib import Path
 from datetime import date, datetime
-from typing import List, Tuple, Dict, Optional, Any
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional, Any, Iterable, Iterator, ContextManager, TYPE_CHECKING
 import logging
-import json
+import orjson
 
 from .config import DB_PATH
+from .pool import SQLiteConnectionPool
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+if TYPE_CHECKING:
+    import numpy as np
+
+# Idle connections kept open by the pool
+POOL_SIZE = 4
+# Idle read-only connections kept open for queries
+READER_POOL_SIZE = 4
+
+# Time period fields derived from entry_date. Fresh databases store them as
+# generated columns so SQLite fills them in on insert
+_ENTRY_PERIOD_COLUMNS = {
+    'year': "CAST(strftime('%Y', entry_date) AS INTEGER)",
+    'quarter': "(CAST(strftime('%m', entry_date) AS INTEGER) + 2) / 3",
+    'month': "CAST(strftime('%m', entry_date) AS INTEGER)",
+    # ISO week: day of year of the Thursday in the same Monday-Sunday week
+    'week_of_year': "(CAST(strftime('%j', entry_date, '-3 days', 'weekday 4') AS INTEGER) - 1) / 7 + 1",
+    # Monday is 0, Sunday is 6
+    'day_of_week': "(CAST(strftime('%w', entry_date) AS INTEGER) + 6) % 7",
+}
+
+# Write statements are kept as module constants so every call passes
+# byte-identical SQL and hits the connection's prepared-statement cache
+_SQL_INSERT_ENTRY = """
+INSERT INTO entries (
+    entry_date, content, word_count, sentence_count, avg_sentence_length,
+    reading_level_flesch, sentiment_score_vader, sentiment_label_vader
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Databases created before the period fields became generated columns still
+# need them in the INSERT; computed from the same expressions, same bindings
+_SQL_INSERT_ENTRY_LEGACY = f"""
+INSERT INTO entries (
+    entry_date, content, word_count, sentence_count, avg_sentence_length,
+    reading_level_flesch, sentiment_score_vader, sentiment_label_vader,
+    {', '.join(_ENTRY_PERIOD_COLUMNS)}
+)
+SELECT entry_date, content, word_count, sentence_count, avg_sentence_length,
+       reading_level_flesch, sentiment_score_vader, sentiment_label_vader,
+       {', '.join(_ENTRY_PERIOD_COLUMNS.values())}
+FROM (SELECT ? AS entry_date, ? AS content, ? AS word_count, ? AS sentence_count,
+             ? AS avg_sentence_length, ? AS reading_level_flesch,
+             ? AS sentiment_score_vader, ? AS sentiment_label_vader)
+"""
+
+_SQL_INSERT_PRONOUN_USAGE = """
+INSERT INTO pronoun_usage (entry_id, pronoun_category, count, percentage)
+VALUES (?, ?, ?, ?)
+"""
+
+_SQL_INSERT_LLM_ANALYSIS = """
+INSERT INTO llm_analysis_results (
+    question_ref, time_period_start, time_period_end, prompt_summary,
+    llm_response, model_used
+) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_UPDATE_ENTRY_EMOTION_SCORES = """
+UPDATE entries
+SET valence_score = ?,
+    arousal_score = ?
+WHERE entry_id = ?
+"""
+
+_SQL_INSERT_EMOTION_ANALYSIS = """
+INSERT INTO emotion_analysis (
+    entry_id,
+    primary_emotions,
+    emotional_patterns,
+    analysis_confidence,
+    llm_reasoning
+) VALUES (?, ?, ?, ?, ?)
+"""
+
+def iso_date(value):
+    """Formats a date/datetime as the ISO text SQLite stores; other values pass through."""
+    # Same text sqlite3's default adapters produce, without the adapter lookup
+    return str(value) if isinstance(value, date) else value
 
 def get_db_connection() -> sqlite3.Connection:
     """Establishes and returns a database connection."""
     try:
-        conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        # check_same_thread=False: pooled connections may be reused by another
+        # thread, though only ever by one at a time
+        # No detect_types: dates come back as their stored ISO text instead of
+        # being parsed per row; see iso_date() for the binding side
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         conn.row_factory = sqlite3.Row # Return rows as dictionary-like objects
         conn.execute("PRAGMA foreign_keys = ON;") # Enforce foreign key constraints
+        if str(DB_PATH) != ':memory:': # WAL needs a file on disk
+            conn.execute("PRAGMA journal_mode = WAL;") # Readers don't block the writer; persists in the db file
+            conn.execute("PRAGMA synchronous = NORMAL;") # In WAL mode, fsync at checkpoints rather than every commit
+            conn.execute("PRAGMA journal_size_limit = 67108864;") # Truncate the WAL back to 64 MiB after checkpoints
+        conn.execute("PRAGMA temp_store = MEMORY;") # Keep temp tables and sort indices off disk
+        conn.execute("PRAGMA cache_size = -65536;") # 64 MiB page cache (negative = KiB)
+        conn.execute("PRAGMA mmap_size = 268435456;") # Read up to 256 MiB of the file via mmap
         return conn
     except sqlite3.Error as e:
         logging.error(f"Database connection error: {e}")
         raise
 
+def get_db_reader_connection() -> sqlite3.Connection:
+    """Establishes and returns a read-only database connection."""
+    try:
+        # mode=ro: never takes the write lock, so under WAL a query neither
+        # waits for nor holds up an import running on the writer connections
+        uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -65536;")
+        conn.execute("PRAGMA mmap_size = 268435456;")
+        return conn
+    except sqlite3.Error as e:
+        logging.error(f"Database reader connection error: {e}")
+        raise
+
+# Columns added to entries after its first release, with the definition used
+# to add them to databases created before then. ALTER TABLE can't add STORED
+# generated columns, so older databases get VIRTUAL ones; indexes on them
+# are materialized either way
+_ENTRIES_ADDED_COLUMNS = {
+    'valence_score': "REAL",
+    'arousal_score': "REAL",
+    'year_month': "TEXT GENERATED ALWAYS AS (strftime('%Y-%m', entry_date)) VIRTUAL",
+    'year_week': "TEXT GENERATED ALWAYS AS (strftime('%Y-W%W', entry_date)) VIRTUAL",
+}
+
+# Whether entries still has plain period columns; detected on the first
+# insert and fixed for the life of the database
+_legacy_entries: Optional[bool] = None
+
+def _entry_columns(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Maps each entries column to its hidden flag: 2 or 3 for generated columns, 0 otherwise."""
+    # table_xinfo rather than table_info: the latter hides generated columns
+    cursor.execute("PRAGMA table_xinfo(entries)")
+    return {row[1]: row[6] for row in cursor.fetchall()}
+
+def _insert_entry_sql(cursor: sqlite3.Cursor) -> str:
+    """The entries INSERT matching this database's schema, checked once per process."""
+    global _legacy_entries
+    if _legacy_entries is None:
+        hidden = _entry_columns(cursor).get('year')
+        if hidden is None:
+            # No entries table yet; the insert fails either way, so check again next time
+            return _SQL_INSERT_ENTRY
+        _legacy_entries = hidden == 0
+    return _SQL_INSERT_ENTRY_LEGACY if _legacy_entries else _SQL_INSERT_ENTRY
+
+def _add_missing_columns(cursor: sqlite3.Cursor):
+    """Brings an existing entries table up to the current schema."""
+    existing = _entry_columns(cursor)
+    for column, definition in _ENTRIES_ADDED_COLUMNS.items():
+        if column not in existing:
+            logging.info(f"Adding column entries.{column}")
+            cursor.execute(f"ALTER TABLE entries ADD COLUMN {column} {definition}")
+
+# Connections reused across calls by the functions below, so the connect and
+# PRAGMA setup above is paid once per connection rather than once per call
+_pool = SQLiteConnectionPool(get_db_connection, size=POOL_SIZE)
+# Read-only queries use their own connections. An in-memory database is
+# private to its connection, so there they share the writers' pool
+if str(DB_PATH) == ':memory:':
+    _read_pool = _pool
+else:
+    _read_pool = SQLiteConnectionPool(get_db_reader_connection, size=READER_POOL_SIZE)
+
+@contextmanager
+def _txn() -> Iterator[Tuple[sqlite3.Connection, sqlite3.Cursor]]:
+    """
+    Yields a pooled connection and a cursor for one transaction: committed if
+    the block completes, rolled back if it raises. The connection always goes
+    back to the pool.
+    """
+    conn = _pool.acquire()
+    try:
+        with conn:
+            yield conn, conn.cursor()
+    finally:
+        _pool.release(conn)
+
+def transaction() -> ContextManager[Tuple[sqlite3.Connection, sqlite3.Cursor]]:
+    """Pooled transaction for the other analysis modules; see _txn()."""
+    return _txn()
+
+def read_connection() -> ContextManager[sqlite3.Connection]:
+    """Borrows a pooled read-only connection, returned to the pool on exit."""
+    return _read_pool.connection()
+
+def close_pool():
+    """
+    Checkpoints the WAL, refreshes planner statistics and closes the pooled
+    connections. Registered with atexit; safe to call more than once. A
+    process that never used the database only closes idle connections, so
+    importing this module doesn't open (or create) the database file.
+    """
+    if _pool.used:
+        conn = _pool.acquire()
+        try:
+            conn.execute("PRAGMA optimize;") # Re-analyzes only tables whose statistics have drifted
+            if str(DB_PATH) != ':memory:':
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE);") # Fold the WAL into the db file and empty it
+        except sqlite3.Error as e:
+            logging.warning(f"Error finalizing database on close: {e}")
+        finally:
+            _pool.release(conn)
+    _pool.close_all()
+    _read_pool.close_all()
+
+atexit.register(close_pool)
+
 def create_tables():
     """Creates the database tables if they don't exist."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Log start of table creation
-        logging.info("Starting database table creation...")
+        with _txn() as (conn, cursor):
+            # Log start of table creation
+            logging.info("Starting database table creation...")
+        
+            period_columns = ",\n".join(
+                f"                    {name} INTEGER NOT NULL GENERATED ALWAYS AS ({expr}) STORED"
+                for name, expr in _ENTRY_PERIOD_COLUMNS.items())
         
-        # Track tables to create
-        tables_to_create = [
-            ("entries", """
-            CREATE TABLE IF NOT EXISTS entries (
-                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_date DATE NOT NULL,
-                content TEXT NOT NULL,
-                word_count INTEGER,
-                sentence_count INTEGER,
-                avg_sentence_length REAL,
-                reading_level_flesch REAL,
-                sentiment_score_vader REAL,
-                sentiment_label_vader TEXT,
-                year INTEGER NOT NULL,
-                quarter INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                week_of_year INTEGER NOT NULL,
-                day_of_week INTEGER NOT NULL,
-                valence_score REAL,
-                arousal_score REAL
-            );"""),
+            # Track tables to create
+            tables_to_create = [
+                ("entries", f"""
+                CREATE TABLE IF NOT EXISTS entries (
+                    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_date DATE NOT NULL,
+                    content TEXT NOT NULL,
+                    word_count INTEGER,
+                    sentence_count INTEGER,
+                    avg_sentence_length REAL,
+                    reading_level_flesch REAL,
+                    sentiment_score_vader REAL,
+                    sentiment_label_vader TEXT,
+{period_columns},
+                    valence_score REAL,
+                    arousal_score REAL,
+                    year_month TEXT GENERATED ALWAYS AS (strftime('%Y-%m', entry_date)) STORED,
+                    year_week TEXT GENERATED ALWAYS AS (strftime('%Y-W%W', entry_date)) STORED
+                );"""),
             
-            ("pronoun_usage", """
-            CREATE TABLE IF NOT EXISTS pronoun_usage (
-                usage_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_id INTEGER NOT NULL,
-                pronoun_category TEXT NOT NULL,
-                count INTEGER NOT NULL,
-                percentage REAL NOT NULL,
-                FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE
-            );"""),
+                ("pronoun_usage", """
+                CREATE TABLE IF NOT EXISTS pronoun_usage (
+                    usage_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_id INTEGER NOT NULL,
+                    pronoun_category TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    percentage REAL NOT NULL,
+                    FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE
+                );"""),
             
-            ("entities", """
-            CREATE TABLE IF NOT EXISTS entities (
-                entity_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                type TEXT NOT NULL
-            );"""),
+                ("entities", """
+                CREATE TABLE IF NOT EXISTS entities (
+                    entity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    type TEXT NOT NULL
+                );"""),
             
-            ("entry_entities", """
-            CREATE TABLE IF NOT EXISTS entry_entities (
-                entry_entity_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_id INTEGER NOT NULL,
-                entity_id INTEGER NOT NULL,
-                context_snippet TEXT,
-                FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE,
-                FOREIGN KEY (entity_id) REFERENCES entities (entity_id) ON DELETE CASCADE,
-                UNIQUE(entry_id, entity_id)
-            );"""),
+                ("entry_entities", """
+                CREATE TABLE IF NOT EXISTS entry_entities (
+                    entry_entity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_id INTEGER NOT NULL,
+                    entity_id INTEGER NOT NULL,
+                    context_snippet TEXT,
+                    FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE,
+                    FOREIGN KEY (entity_id) REFERENCES entities (entity_id) ON DELETE CASCADE,
+                    UNIQUE(entry_id, entity_id)
+                );"""),
             
-            ("emotion_analysis", """
-            CREATE TABLE IF NOT EXISTS emotion_analysis (
-                analysis_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entry_id INTEGER NOT NULL,
-                primary_emotions TEXT NOT NULL,  -- JSON array of emotions
-                emotional_patterns TEXT,
-                analysis_confidence REAL,
-                llm_reasoning TEXT,
-                FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE
-            );"""),
+                ("emotion_analysis", """
+                CREATE TABLE IF NOT EXISTS emotion_analysis (
+                    analysis_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_id INTEGER NOT NULL,
+                    primary_emotions TEXT NOT NULL,  -- JSON array of emotions
+                    emotional_patterns TEXT,
+                    analysis_confidence REAL,
+                    llm_reasoning TEXT,
+                    FOREIGN KEY (entry_id) REFERENCES entries (entry_id) ON DELETE CASCADE
+                );"""),
             
-            ("llm_analysis_results", """
-            CREATE TABLE IF NOT EXISTS llm_analysis_results (
-                analysis_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                question_ref TEXT,
-                time_period_start DATE,
-                time_period_end DATE,
-                prompt_summary TEXT,
-                llm_response TEXT NOT NULL,
-                model_used TEXT,
-                analysis_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            );""")
-        ]
+                ("llm_analysis_results", """
+                CREATE TABLE IF NOT EXISTS llm_analysis_results (
+                    analysis_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    question_ref TEXT,
+                    time_period_start DATE,
+                    time_period_end DATE,
+                    prompt_summary TEXT,
+                    llm_response TEXT NOT NULL,
+                    model_used TEXT,
+                    analysis_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                );"""),
+                
+                # Written by error_manager.log_error; no foreign key so errors
+                # about entries that never got stored can still be recorded
+                ("analysis_errors", """
+                CREATE TABLE IF NOT EXISTS analysis_errors (
+                    error_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    analysis_type TEXT NOT NULL,
+                    entry_id INTEGER,
+                    period_start DATE,
+                    period_end DATE,
+                    error_message TEXT,
+                    error_details TEXT CHECK (error_details IS NULL OR json_valid(error_details)),  -- JSON object
+                    error_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    resolved BOOLEAN NOT NULL DEFAULT FALSE,
+                    resolution_timestamp DATETIME,
+                    resolution_notes TEXT
+                );"""),
+                
+                # LLM emotion results keyed by a hash of backend, model, prompt version
+                # and entry text; see emotion_analyzer
+                ("llm_emotion_cache", """
+                CREATE TABLE IF NOT EXISTS llm_emotion_cache (
+                    key TEXT PRIMARY KEY,
+                    result_json TEXT NOT NULL
+                ) WITHOUT ROWID;"""),
+                
+                # Raw LLM responses keyed by a hash of backend, model, system
+                # prompt and prompt; see llm_manager.query_llm
+                ("llm_response_cache", """
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                ) WITHOUT ROWID;""")
+            ]
         
-        # Create each table and log the process
-        for table_name, create_sql in tables_to_create:
-            logging.info(f"Creating table: {table_name}")
-            try:
-                cursor.execute(create_sql)
-                logging.info(f"Successfully created table: {table_name}")
-            except sqlite3.Error as e:
-                logging.error(f"Error creating {table_name} table: {e}")
-                raise
+            # Create each table and log the process
+            for table_name, create_sql in tables_to_create:
+                logging.info(f"Creating table: {table_name}")
+                try:
+                    cursor.execute(create_sql)
+                    logging.info(f"Successfully created table: {table_name}")
+                except sqlite3.Error as e:
+                    logging.error(f"Error creating {table_name} table: {e}")
+                    raise
         
-        # Verify tables were created
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        existing_tables = [t[0] for t in cursor.fetchall()]
-        logging.info(f"Tables in database after creation: {existing_tables}")
+            _add_missing_columns(cursor)
         
-        # Check for missing tables
-        expected_tables = {t[0] for t in tables_to_create}
-        missing_tables = expected_tables - set(existing_tables)
-        if missing_tables:
-            logging.error(f"Failed to create tables: {missing_tables}")
-            raise Exception(f"Missing tables after creation: {missing_tables}")
+            # get_entity_mentions filters entry_entities by entity_id; the
+            # UNIQUE(entry_id, entity_id) index leads with entry_id and can't
+            # serve that lookup, so add one led by entity_id
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entry_entities_entity
+            ON entry_entities (entity_id, entry_id);""")
+        
+            # Covers get_quantitative_trend: the date range and every trend metric
+            # live in the index, and the year and quarter groupings are derived
+            # from entry_date, so the trend scan never reads the (content-heavy)
+            # table rows. Replaces idx_entries_date_metrics, which also carried
+            # the unused year and quarter columns
+            cursor.execute("DROP INDEX IF EXISTS idx_entries_date_metrics;")
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entries_trend_metrics
+            ON entries (entry_date, word_count, sentence_count,
+                        avg_sentence_length, reading_level_flesch, sentiment_score_vader);""")
+        
+            # Month and week trends group by the generated period columns; these
+            # indexes hand the grouping rows already in period order, so there is
+            # no strftime per row and no sort
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entries_year_month
+            ON entries (year_month, entry_date);""")
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entries_year_week
+            ON entries (year_week, entry_date);""")
+            
+            # export_emotion_data reads only the entries that have emotion scores,
+            # in date order; this partial index lists exactly those rows, already
+            # sorted, so the export neither sorts nor visits unscored entries
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entries_date_emotion
+            ON entries (entry_date)
+            WHERE valence_score IS NOT NULL AND arousal_score IS NOT NULL;""")
             
-        conn.commit()
+            # Lets error triage filter on the exception class inside
+            # error_details, e.g. WHERE json_extract(error_details, '$.error_type') = 'JSONDecodeError',
+            # with an index seek instead of parsing every row's JSON
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_errors_error_type
+            ON analysis_errors (json_extract(error_details, '$.error_type'));""")
+        
+            # Verify tables were created
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            existing_tables = [t[0] for t in cursor.fetchall()]
+            logging.info(f"Tables in database after creation: {existing_tables}")
+        
+            # Check for missing tables
+            expected_tables = {t[0] for t in tables_to_create}
+            missing_tables = expected_tables - set(existing_tables)
+            if missing_tables:
+                logging.error(f"Failed to create tables: {missing_tables}")
+                raise Exception(f"Missing tables after creation: {missing_tables}")
+
         logging.info("All database tables created and committed successfully")
         
     except sqlite3.Error as e:
         logging.error(f"SQLite error during table creation: {str(e)}")
-        conn.rollback()
         raise
     except Exception as e:
         logging.error(f"Unexpected error during table creation: {str(e)}")
-        conn.rollback()
         raise
-    finally:
-        conn.close()
 
 def insert_entry(entry_date: date, content: str, metrics: Dict[str, Any], pronoun_data: Dict[str, Dict[str, Any]]):
     """Inserts a single journal entry and its associated metrics and pronoun usage."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    entry_ids = insert_entries([(entry_date, content, metrics, pronoun_data)])
+    return entry_ids[0] if entry_ids else None
+
+def insert_entries(entries: Iterable[Tuple[date, str, Dict[str, Any], Dict[str, Dict[str, Any]]]]) -> List[int]:
+    """
+    Inserts a batch of journal entries with their metrics and pronoun usage
+    in a single transaction.
+
+    Args:
+        entries: (entry_date, content, metrics, pronoun_data) tuples.
+
+    Returns:
+        The new entry_ids in input order, or an empty list if the batch was
+        rolled back.
+    """
+    entry_ids = []
+    entry_date = None
     try:
-        # Calculate time period fields
-        year = entry_date.year
-        month = entry_date.month
-        day_of_week = entry_date.weekday() # Monday is 0, Sunday is 6
-        week_of_year = entry_date.isocalendar()[1]
-        quarter = (month - 1) // 3 + 1
-
-        cursor.execute("""
-        INSERT INTO entries (
-            entry_date, content, word_count, sentence_count, avg_sentence_length,
-            reading_level_flesch, sentiment_score_vader, sentiment_label_vader,
-            year, quarter, month, week_of_year, day_of_week
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            entry_date, content, metrics.get('word_count'), metrics.get('sentence_count'),
-            metrics.get('avg_sentence_length'), metrics.get('reading_level_flesch'),
-            metrics.get('sentiment_score_vader'), metrics.get('sentiment_label_vader'),
-            year, quarter, month, week_of_year, day_of_week
-        ))
-        entry_id = cursor.lastrowid
-
-        # Insert pronoun usage
-        if entry_id and pronoun_data:
-            pronoun_rows = []
-            for category, data in pronoun_data.items():
-                pronoun_rows.append((entry_id, category, data['count'], data['percentage']))
-            cursor.executemany("""
-            INSERT INTO pronoun_usage (entry_id, pronoun_category, count, percentage)
-            VALUES (?, ?, ?, ?)
-            """, pronoun_rows)
-
-        conn.commit()
-        logging.debug(f"Inserted entry ID: {entry_id} for date {entry_date}")
-        return entry_id
+        with _txn() as (conn, cursor):
+            insert_sql = _insert_entry_sql(cursor)
+            for entry_date, content, metrics, pronoun_data in entries:
+                # Time period fields are derived from entry_date by SQLite
+                cursor.execute(insert_sql, (
+                    iso_date(entry_date), content, metrics.get('word_count'), metrics.get('sentence_count'),
+                    metrics.get('avg_sentence_length'), metrics.get('reading_level_flesch'),
+                    metrics.get('sentiment_score_vader'), metrics.get('sentiment_label_vader')
+                ))
+                entry_id = cursor.lastrowid
+                entry_ids.append(entry_id)
+
+                # executemany consumes the generator directly; no row list is built
+                if entry_id and pronoun_data:
+                    cursor.executemany(_SQL_INSERT_PRONOUN_USAGE, (
+                        (entry_id, category, data['count'], data['percentage'])
+                        for category, data in pronoun_data.items()))
+
+        logging.debug(f"Inserted {len(entry_ids)} entries")
+        return entry_ids
     except sqlite3.Error as e:
-        logging.error(f"Error inserting entry for date {entry_date}: {e}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
+        logging.error(f"Error inserting entry batch (at date {entry_date}): {e}")
+        return []
+
+def analyze_tables():
+    """Refreshes the query planner's statistics; run after bulk imports."""
+    try:
+        with _txn() as (conn, cursor):
+            cursor.execute("ANALYZE;")
+    except sqlite3.Error as e:
+        logging.error(f"Error analyzing database: {e}")
 
 def get_entries_by_date_range(start_date: date, end_date: date) -> List[sqlite3.Row]:
-    """Retrieves entries within a specified date range."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Retrieves entries within a specified date range; entry_date is returned as 'YYYY-MM-DD' text."""
     try:
-        cursor.execute("""
-        SELECT entry_id, entry_date, content, word_count
-        FROM entries
-        WHERE entry_date BETWEEN ? AND ?
-        ORDER BY entry_date ASC
-        """, (start_date, end_date))
-        entries = cursor.fetchall()
+        with _read_pool.connection() as conn:
+            entries = conn.execute("""
+            SELECT entry_id, entry_date, content, word_count
+            FROM entries
+            WHERE entry_date BETWEEN ? AND ?
+            ORDER BY entry_date ASC
+            """, (iso_date(start_date), iso_date(end_date))).fetchall()
         logging.info(f"Retrieved {len(entries)} entries between {start_date} and {end_date}")
         return entries
     except sqlite3.Error as e:
         logging.error(f"Error retrieving entries for range {start_date} - {end_date}: {e}")
         return []
-    finally:
-        conn.close()
 
 def insert_llm_analysis(question_ref: str, start_date: date, end_date: date,
                         prompt_summary: str, llm_response: str, model_used: str):
     """Stores the result of an LLM analysis query."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("""
-        INSERT INTO llm_analysis_results (
-            question_ref, time_period_start, time_period_end, prompt_summary,
-            llm_response, model_used
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (question_ref, start_date, end_date, prompt_summary, llm_response, model_used))
-        conn.commit()
+        with _txn() as (conn, cursor):
+            cursor.execute(_SQL_INSERT_LLM_ANALYSIS, (question_ref, iso_date(start_date), iso_date(end_date), prompt_summary, llm_response, model_used))
         analysis_id = cursor.lastrowid
         logging.info(f"Stored LLM analysis result ID: {analysis_id}")
         return analysis_id
     except sqlite3.Error as e:
         logging.error(f"Error storing LLM analysis result: {e}")
-        conn.rollback()
         return None
-    finally:
-        conn.close()
+
+# Metric columns get_quantitative_trend may aggregate
+_TREND_METRICS = frozenset({
+    'word_count', 'sentence_count', 'avg_sentence_length', 'reading_level_flesch', 'sentiment_score_vader'
+})
+
+# period -> (select clause, group by clause, range clause)
+_TREND_PERIOD_SQL = {
+    'year': ("strftime('%Y', entry_date) as period_label", "strftime('%Y', entry_date)", ""),
+    # SQLite doesn't have a direct quarter function, group by year and quarter
+    # number. Derived from entry_date rather than read from the generated
+    # columns: SQLite won't answer from a covering index through those
+    'quarter': (f"printf('%d-Q%d', {_ENTRY_PERIOD_COLUMNS['year']}, {_ENTRY_PERIOD_COLUMNS['quarter']}) as period_label",
+                f"{_ENTRY_PERIOD_COLUMNS['year']}, {_ENTRY_PERIOD_COLUMNS['quarter']}", ""),
+    # The range clauses are redundant with the date range, but let the planner
+    # seek idx_entries_year_month / idx_entries_year_week instead of scanning
+    # by entry_date
+    'month': ("year_month as period_label", "year_month",
+              "year_month BETWEEN strftime('%Y-%m', :start_date) AND strftime('%Y-%m', :end_date) AND"),
+    # Use ISO week date format YYYY-Www
+    'week': ("year_week as period_label", "year_week",
+             "year_week BETWEEN strftime('%Y-W%W', :start_date) AND strftime('%Y-W%W', :end_date) AND"),
+}
+
+@lru_cache(maxsize=None)
+def _build_trend_query(metric: str, period: str) -> str:
+    """Builds the trend SQL for a validated metric/period pair; cached so repeat
+    calls reuse one string and hit the connection's statement cache."""
+    select_clause, group_by_clause, range_clause = _TREND_PERIOD_SQL[period]
+
+    query = f"""
+    SELECT
+        {select_clause},
+        AVG({metric}) as avg_value
+    FROM entries
+    WHERE {range_clause} entry_date BETWEEN :start_date AND :end_date
+    GROUP BY {group_by_clause}
+    ORDER BY period_label ASC;
+    """
+    return query
 
 def get_quantitative_trend(metric: str, period: str, start_date: date, end_date: date) -> List[Tuple[str, float]]:
     """
@@ -241,53 +550,90 @@ def get_quantitative_trend(metric: str, period: str, start_date: date, end_date:
         A list of tuples, where each tuple is (period_label, average_metric_value).
         Example: [('2014-01', -0.25), ('2014-02', 0.15), ...]
     """
-    if period not in ['year', 'month', 'quarter', 'week']:
+    if period not in _TREND_PERIOD_SQL:
         raise ValueError("Invalid period. Choose 'year', 'quarter', 'month', or 'week'.")
-    if metric not in ['word_count', 'sentence_count', 'avg_sentence_length', 'reading_level_flesch', 'sentiment_score_vader']:
+    if metric not in _TREND_METRICS:
          raise ValueError(f"Invalid metric column: {metric}")
 
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Construct the grouping and formatting based on the period
-    if period == 'year':
-        group_by_clause = "strftime('%Y', entry_date)"
-        select_clause = "strftime('%Y', entry_date) as period_label"
-    elif period == 'month':
-        group_by_clause = "strftime('%Y-%m', entry_date)"
-        select_clause = "strftime('%Y-%m', entry_date) as period_label"
-    elif period == 'quarter':
-        # SQLite doesn't have a direct quarter function, group by year and quarter number
-        group_by_clause = "year, quarter"
-        select_clause = "printf('%d-Q%d', year, quarter) as period_label"
-    elif period == 'week':
-        # Use ISO week date format YYYY-Www
-        group_by_clause = "strftime('%Y-W%W', entry_date)"
-        select_clause = "strftime('%Y-W%W', entry_date) as period_label"
-
-    query = f"""
-    SELECT
-        {select_clause},
-        AVG({metric}) as avg_value
-    FROM entries
-    WHERE entry_date BETWEEN ? AND ?
-    GROUP BY {group_by_clause}
-    ORDER BY period_label ASC;
-    """
+    query = _build_trend_query(metric, period)
 
     try:
-        cursor.execute(query, (start_date, end_date))
-        results = cursor.fetchall()
-        # Convert results from sqlite3.Row to simple tuples
-        trend_data = [(row['period_label'], row['avg_value']) for row in results]
+        with _read_pool.connection() as conn:
+            cursor = conn.cursor()
+            # Plain tuples straight from sqlite3, no per-row conversion from sqlite3.Row
+            cursor.row_factory = None
+            cursor.execute(query, {'start_date': iso_date(start_date), 'end_date': iso_date(end_date)})
+            trend_data = cursor.fetchall()
         logging.info(f"Retrieved {len(trend_data)} data points for {metric} trend by {period}.")
         return trend_data
     except sqlite3.Error as e:
         logging.error(f"Error retrieving trend data for {metric} by {period}: {e}")
         return []
-    finally:
-        conn.close()
+
+def get_quantitative_trend_np(metric: str, period: str, start_date: date,
+                              end_date: date) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Columnar form of get_quantitative_trend for plotting.
+
+    Returns:
+        (labels, values): a unicode array of period labels and a float64 array
+        of averages, with NaN where a period has no value for the metric.
+    """
+    import numpy as np  # Only needed by the charting callers
+
+    trend_data = get_quantitative_trend(metric, period, start_date, end_date)
+    labels = np.fromiter((label for label, _ in trend_data), dtype='U16', count=len(trend_data))
+    values = np.fromiter((np.nan if value is None else value for _, value in trend_data),
+                         dtype=np.float64, count=len(trend_data))
+    return labels, values
+
+def get_cached_llm_result(key: str) -> Optional[str]:
+    """Returns the cached LLM result JSON for a cache key, or None on a miss."""
+    try:
+        with _read_pool.connection() as conn:
+            row = conn.execute("SELECT result_json FROM llm_emotion_cache WHERE key = ?", (key,)).fetchone()
+        return row['result_json'] if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Error reading LLM cache: {e}")
+        return None
+
+def cache_llm_result(key: str, result_json: str):
+    """Stores an LLM result under a cache key; an existing entry is kept."""
+    try:
+        with _txn() as (conn, cursor):
+            cursor.execute("INSERT OR IGNORE INTO llm_emotion_cache (key, result_json) VALUES (?, ?)",
+                           (key, result_json))
+    except sqlite3.Error as e:
+        logging.error(f"Error writing LLM cache: {e}")
+
+def get_cached_llm_response(key: str, max_age_days: Optional[int] = None) -> Optional[str]:
+    """Returns the cached raw LLM response for a cache key, or None on a miss
+    or when it was stored more than max_age_days ago."""
+    try:
+        with _read_pool.connection() as conn:
+            if max_age_days is None:
+                row = conn.execute("SELECT response FROM llm_response_cache WHERE key = ?", (key,)).fetchone()
+            else:
+                row = conn.execute("""
+                SELECT response FROM llm_response_cache
+                WHERE key = ? AND created_at >= datetime('now', ?)
+                """, (key, f"-{max_age_days} days")).fetchone()
+        return row['response'] if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Error reading LLM response cache: {e}")
+        return None
+
+def cache_llm_response(key: str, response: str):
+    """Stores a raw LLM response under a cache key, replacing any existing entry."""
+    try:
+        with _txn() as (conn, cursor):
+            # Replace rather than ignore: an expired or bypassed entry gets
+            # the fresh response and a new created_at
+            cursor.execute("INSERT OR REPLACE INTO llm_response_cache (key, response) VALUES (?, ?)",
+                           (key, response))
+    except sqlite3.Error as e:
+        logging.error(f"Error writing LLM response cache: {e}")
 
 # --- Entity Functions ---
 # Note: Entity management functions have been moved to entity_manager.py
@@ -295,38 +641,44 @@ def get_quantitative_trend(metric: str, period: str, start_date: date, end_date:
 
 def store_emotion_analysis(entry_id: int, analysis: Dict):
     """Store emotion analysis results."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Update basic scores in entries table
-        cursor.execute("""
-            UPDATE entries 
-            SET valence_score = ?,
-                arousal_score = ?
-            WHERE entry_id = ?
-        """, (analysis['valence'], analysis['arousal'], entry_id))
-        
-        # Store detailed analysis
-        cursor.execute("""
-            INSERT INTO emotion_analysis (
+    store_emotion_analyses([(entry_id, analysis)])
+
+def store_emotion_analyses(items: List[Tuple[int, Dict]]) -> List[int]:
+    """
+    Store emotion analysis results for several entries in one transaction.
+
+    Returns:
+        The entry_ids whose analysis was stored. Malformed analyses are logged
+        and skipped; on a database error nothing is stored.
+    """
+    score_rows = []
+    analysis_rows = []
+    for entry_id, analysis in items:
+        try:
+            score_row = (analysis['valence'], analysis['arousal'], entry_id)
+            analysis_row = (
                 entry_id,
-                primary_emotions,
-                emotional_patterns,
-                analysis_confidence,
-                llm_reasoning
-            ) VALUES (?, ?, ?, ?, ?)
-        """, (
-            entry_id,
-            json.dumps(analysis['primary_emotions']),
-            analysis['emotional_patterns'],
-            analysis['confidence'],
-            analysis['reasoning']
-        ))
-        
-        conn.commit()
+                orjson.dumps(analysis['primary_emotions']).decode(),
+                analysis['emotional_patterns'],
+                analysis['confidence'],
+                analysis['reasoning']
+            )
+        except (KeyError, TypeError) as e:
+            logging.error(f"Malformed emotion analysis for entry {entry_id}: {e}")
+            continue
+        score_rows.append(score_row)
+        analysis_rows.append(analysis_row)
+    if not score_rows:
+        return []
+
+    try:
+        with _txn() as (conn, cursor):
+            # Update basic scores in entries table
+            cursor.executemany(_SQL_UPDATE_ENTRY_EMOTION_SCORES, score_rows)
+            
+            # Store detailed analysis
+            cursor.executemany(_SQL_INSERT_EMOTION_ANALYSIS, analysis_rows)
+        return [row[0] for row in analysis_rows]
     except sqlite3.Error as e:
         logging.error(f"Error storing emotion analysis: {e}")
-        conn.rollback()
-    finally:
-        conn.close() 
\ No newline at end of file
+        return [] 
\ No newline at end of file
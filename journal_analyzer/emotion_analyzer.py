@@ -1,19 +1,30 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import json
 import logging
-from .llm_manager import query_llm, parse_llm_json_response
+import re
+import orjson
+from .llm_manager import (query_llm, parse_llm_json_response, json_fields_validator, llm_cache_key,
+                          submit_batch, collect_batch)
 from .config import DEFAULT_LLM_MODEL
+from .database_manager import get_cached_llm_result, cache_llm_result
 from .error_manager import log_error
 
-class LLMEmotionAnalyzer:
-    def analyze_emotion(self, text: str) -> Dict[str, float]:
-        """Analyze emotional content using LLM."""
-        logging.info("Starting emotion analysis for entry")
-        
-        prompt = f"""You are an expert at analyzing emotional content in journal entries.
-        Analyze the emotional state of the writer of this journal entry. Consider the full context,
-        subtext, and nuanced emotional expressions.
+# Part of every cache key; bump whenever the emotion prompts change so results
+# from the old wording are no longer served
+PROMPT_VERSION = 2
+
+# Entries per batched emotion prompt; large enough to amortize the shared
+# instructions, small enough that per-entry accuracy holds up
+EMOTION_BATCH_SIZE = 8
+
+# Batched prompts in flight at once; the calls are network-bound, so threads
+# overlap the round trips while staying well under provider rate limits
+EMOTION_CONCURRENCY = 4
 
+# Scoring rubric shared by the single-entry and batched prompts
+_EMOTION_RUBRIC = """
         Provide two scores:
         1. Valence (positivity-negativity) on a 0-10 scale where:
            - 0 = extremely negative (even if brief)
@@ -27,48 +38,40 @@ class LLMEmotionAnalyzer:
 
         Also identify the primary emotions present and any emotional patterns. 
         Statements which do not contain emotional content or imply an emotional state will not affect the scores. 
-        Scores reflect the state of the writer, not overall text.
+        Scores reflect the state of the writer, not overall text."""
 
-        Journal text:
-        {text}
-
-        Respond in JSON format:
-        {{
+_EMOTION_JSON_FORMAT = """{
             "valence": float,
             "arousal": float,
             "primary_emotions": [str],
             "emotional_patterns": str,
             "confidence": float,
             "reasoning": str
-        }}
+        }"""
+
+# Static instructions go in the system prompt, built once here; each call only
+# sends the journal text as the user message, and servers with prefix caching
+# can reuse the processed instructions across calls
+_EMOTION_SYSTEM_PROMPT = f"""You are an expert at analyzing emotional content in journal entries.
+        Analyze the emotional state of the writer of this journal entry. Consider the full context,
+        subtext, and nuanced emotional expressions.
+{_EMOTION_RUBRIC}
+
+        Respond in JSON format:
+        {_EMOTION_JSON_FORMAT}
         """
 
-        try:
-            response = query_llm(prompt)
-            
-            required_fields = ['valence', 'arousal', 'primary_emotions', 'emotional_patterns', 'confidence']
-            defaults = {
-                'valence': 5.0,
-                'arousal': 5.0,
-                'primary_emotions': ['neutral'],
-                'emotional_patterns': 'No patterns detected',
-                'confidence': 0.5,
-                'reasoning': 'Incomplete analysis'
-            }
-            
-            return parse_llm_json_response(response, required_fields, defaults)
-            
-        except Exception as e:
-            logging.error(f"Error in emotion_analyzer: {e}")
-            return None
+_EMOTION_BATCH_SYSTEM_PROMPT = f"""You are an expert at analyzing emotional content in journal entries.
+        Analyze the emotional state of the writer of each numbered journal entry, scoring every
+        entry on its own. Consider the full context, subtext, and nuanced emotional expressions.
+{_EMOTION_RUBRIC}
 
-    def analyze_emotional_development(self, entries: list[str]) -> Dict:
-        """Analyze emotional patterns across multiple entries."""
-        logging.info("Starting emotional development analysis")
-        
-        entries_text = "\n---\n".join(entries)
-        
-        prompt = f"""
+        For each entry, respond with its number followed by a JSON object, one per entry in order:
+        Output #1: {_EMOTION_JSON_FORMAT}
+        Output #2: {{...}}
+        """
+
+_DEVELOPMENT_SYSTEM_PROMPT = """
         Analyze the emotional development and patterns across these journal entries.
         Focus on:
         1. How emotions evolve over time
@@ -76,24 +79,205 @@ class LLMEmotionAnalyzer:
         3. Emotional self-awareness and regulation
         4. Key emotional triggers
 
-        Journal entries:
-        {entries_text}
-
         Respond in JSON format:
-        {{
+        {
             "emotional_trajectory": str,
             "recurring_patterns": [str],
             "growth_areas": [str],
             "key_triggers": [str],
             "recommendations": [str]
-        }}
+        }
         """
 
+EMOTION_REQUIRED_FIELDS = ['valence', 'arousal', 'primary_emotions', 'emotional_patterns', 'confidence']
+EMOTION_DEFAULTS = {
+    'valence': 5.0,
+    'arousal': 5.0,
+    'primary_emotions': ['neutral'],
+    'emotional_patterns': 'No patterns detected',
+    'confidence': 0.5,
+    'reasoning': 'Incomplete analysis'
+}
+
+# Splits a batched response into its "Output #<n>:" sections
+_OUTPUT_MARKER = re.compile(r'Output\s*#\s*(\d+)\s*:')
+
+# Accepts a response only if the model supplied every required field itself
+_is_complete_emotion = json_fields_validator(EMOTION_REQUIRED_FIELDS)
+
+def _split_outputs(response: str) -> Dict[int, str]:
+    """Splits a batched response into output number -> its JSON fragment."""
+    # re.split with one group yields [preamble, n, fragment, n, fragment, ...]
+    parts = _OUTPUT_MARKER.split(response)
+    return {int(n): fragment for n, fragment in zip(parts[1::2], parts[2::2])}
+
+def _emotion_cache_key(text: str) -> str:
+    """Cache key for an entry's emotion analysis under the active backend, model and prompt."""
+    return llm_cache_key(str(PROMPT_VERSION), text)
+
+@lru_cache(maxsize=4096)
+def _load_cached_emotion(key: str) -> Dict:
+    """Reads a cached analysis, remembered in-process after the first hit."""
+    result_json = get_cached_llm_result(key)
+    if result_json is None:
+        # Raised rather than returned so lru_cache doesn't remember the miss
+        raise KeyError(key)
+    return orjson.loads(result_json)
+
+def _cached_emotion(text: str) -> Optional[Dict]:
+    """Returns a copy of the cached analysis for text, or None on a miss."""
+    try:
+        return dict(_load_cached_emotion(_emotion_cache_key(text)))
+    except KeyError:
+        return None
+
+def _cache_emotion(text: str, response: str, result: Dict):
+    """Caches an analysis if the model's response had every required field;
+    failures and results padded with EMOTION_DEFAULTS are left to be retried."""
+    if _is_complete_emotion(response):
+        cache_llm_result(_emotion_cache_key(text), orjson.dumps(result).decode())
+
+class LLMEmotionAnalyzer:
+    def analyze_emotion(self, text: str) -> Dict[str, float]:
+        """Analyze emotional content using LLM."""
+        cached = _cached_emotion(text)
+        if cached is not None:
+            return cached
+        logging.info("Starting emotion analysis for entry")
+
         try:
-            response = query_llm(prompt)
+            response = query_llm("Journal text:\n" + text, system=_EMOTION_SYSTEM_PROMPT,
+                                 validate=_is_complete_emotion)
+            result = parse_llm_json_response(response, EMOTION_REQUIRED_FIELDS, EMOTION_DEFAULTS)
+            _cache_emotion(text, response, result)
+            return result
             
+        except Exception as e:
+            logging.error(f"Error in emotion_analyzer: {e}")
+            return None
+
+    def analyze_emotion_batch(self, entries: list[tuple[int, str]],
+                              batch_size: int = EMOTION_BATCH_SIZE,
+                              concurrency: int = EMOTION_CONCURRENCY) -> Dict[int, Optional[Dict]]:
+        """
+        Analyze several entries per LLM call, sending the instructions once per batch.
+
+        Args:
+            entries: (entry_id, text) pairs.
+            batch_size: Entries per prompt.
+            concurrency: Prompts sent at the same time.
+
+        Returns:
+            entry_id -> analysis dict (None if the analysis failed). Entries
+            whose output is missing or unparseable in the batched response are
+            re-analyzed on their own with analyze_emotion. Cached analyses are
+            reused without a call.
+        """
+        results = {}
+        pending = []
+        for entry_id, text in entries:
+            cached = _cached_emotion(text)
+            if cached is None:
+                pending.append((entry_id, text))
+            else:
+                results[entry_id] = cached
+        
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for batch_results in executor.map(self._analyze_prompt_batch, batches):
+                    results.update(batch_results)
+        return results
+
+    def _analyze_prompt_batch(self, batch: list[tuple[int, str]]) -> Dict[int, Optional[Dict]]:
+        """Analyze one batch of (entry_id, text) pairs with a single LLM call."""
+        logging.info(f"Starting emotion analysis for {len(batch)} entries")
+        
+        entries_text = "\n\n".join(f"Entry #{i}:\n{text}" for i, (_, text) in enumerate(batch, 1))
+
+        def complete_batch(response: str) -> bool:
+            # Cache the batched response only if every entry got a full output
+            outputs = _split_outputs(response)
+            return all(_is_complete_emotion(outputs.get(i)) for i in range(1, len(batch) + 1))
+
+        outputs = {}
+        try:
+            response = query_llm(entries_text, system=_EMOTION_BATCH_SYSTEM_PROMPT,
+                                 validate=complete_batch) or ""
+            outputs = _split_outputs(response)
+        except Exception as e:
+            logging.error(f"Error in batched emotion analysis: {e}")
+        
+        results = {}
+        for i, (entry_id, text) in enumerate(batch, 1):
+            try:
+                results[entry_id] = parse_llm_json_response(outputs.get(i), EMOTION_REQUIRED_FIELDS,
+                                                            EMOTION_DEFAULTS)
+                _cache_emotion(text, outputs[i], results[entry_id])
+            except Exception:
+                logging.warning(f"No usable batched output for entry {entry_id}; analyzing it alone")
+                results[entry_id] = self.analyze_emotion(text)
+        return results
+
+    def submit_emotion_batch(self, entries: list[tuple[int, str]]) -> Tuple[Optional[str], Dict[int, Dict]]:
+        """
+        Submit entries as an offline batch job, one request per entry; fetch
+        the results later with collect_emotion_batch.
+
+        Args:
+            entries: (entry_id, text) pairs.
+
+        Returns:
+            (batch id, or None if nothing was submitted, entry_id -> cached
+            analysis for the entries that didn't need a request)
+        """
+        cached_results = {}
+        prompts = {}
+        for entry_id, text in entries:
+            cached = _cached_emotion(text)
+            if cached is None:
+                prompts[str(entry_id)] = "Journal text:\n" + text
+            else:
+                cached_results[entry_id] = cached
+        
+        batch_id = submit_batch(prompts, system=_EMOTION_SYSTEM_PROMPT) if prompts else None
+        return batch_id, cached_results
+
+    def collect_emotion_batch(self, batch_id: str) -> Optional[Dict[int, Optional[Dict]]]:
+        """
+        Parse the results of a batch job from submit_emotion_batch.
+
+        Returns:
+            entry_id -> analysis dict (None if its output was unusable), or
+            None while the job is still running. Results aren't added to the
+            emotion cache, which is keyed by entry text.
+        """
+        responses = collect_batch(batch_id)
+        if responses is None:
+            return None
+        
+        results = {}
+        for custom_id, response in responses.items():
+            try:
+                results[int(custom_id)] = parse_llm_json_response(response, EMOTION_REQUIRED_FIELDS,
+                                                                 EMOTION_DEFAULTS)
+            except Exception as e:
+                logging.warning(f"Unusable batch output for entry {custom_id}: {e}")
+                results[int(custom_id)] = None
+        return results
+
+    def analyze_emotional_development(self, entries: list[str]) -> Dict:
+        """Analyze emotional patterns across multiple entries."""
+        logging.info("Starting emotional development analysis")
+        
+        entries_text = "\n---\n".join(entries)
+
+        try:
             required_fields = ['emotional_trajectory', 'recurring_patterns', 'growth_areas', 
                              'key_triggers', 'recommendations']
+            response = query_llm("Journal entries:\n" + entries_text, system=_DEVELOPMENT_SYSTEM_PROMPT,
+                                 validate=json_fields_validator(required_fields))
+            
             defaults = {
                 'emotional_trajectory': 'No clear trajectory detected',
                 'recurring_patterns': [],
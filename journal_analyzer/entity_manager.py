@@ -1,7 +1,8 @@
 import sqlite3
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import logging
-from .database_manager import get_db_connection
+from dataclasses import dataclass, field
+from .database_manager import transaction, read_connection
 
 def get_or_create_entity(name: str, entity_type: str) -> Optional[int]:
     """Finds an entity by name or creates it if it doesn't exist. Returns entity_id."""
@@ -9,54 +10,103 @@ def get_or_create_entity(name: str, entity_type: str) -> Optional[int]:
         logging.error("Invalid entity name or type")
         return None
         
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT entity_id FROM entities WHERE name = ?", (name,))
-        result = cursor.fetchone()
-        if result:
-            return result['entity_id']
-        
-        cursor.execute("INSERT INTO entities (name, type) VALUES (?, ?)",
-                      (name, entity_type))
-        conn.commit()
-        entity_id = cursor.lastrowid
-        logging.info(f"Created entity '{name}' (Type: {entity_type}) ID: {entity_id}")
+        with transaction() as (conn, cursor):
+            # One statement for both cases: the no-op DO UPDATE makes RETURNING
+            # yield the existing row's id when the name is already taken, and the
+            # UNIQUE(name) conflict is resolved inside SQLite, so concurrent
+            # callers can't race between a lookup and the insert
+            cursor.execute("""
+            INSERT INTO entities (name, type) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET type = type
+            RETURNING entity_id
+            """, (name, entity_type))
+            entity_id = cursor.fetchone()['entity_id']
+        logging.debug(f"Resolved entity '{name}' (Type: {entity_type}) ID: {entity_id}")
         return entity_id
-    except sqlite3.IntegrityError:
-        # Handle potential race condition if run concurrently
-        cursor.execute("SELECT entity_id FROM entities WHERE name = ?", (name,))
-        result = cursor.fetchone()
-        return result['entity_id'] if result else None
     except sqlite3.Error as e:
         logging.error(f"Error with entity '{name}': {e}")
-        conn.rollback()
         return None
-    finally:
-        conn.close()
+
+def get_or_create_entities(entities: List[Tuple[str, str]]) -> Dict[str, int]:
+    """Resolves many (name, type) pairs in one transaction. Returns {name: entity_id}.
+
+    Existing names are looked up with batched IN queries; only the residual
+    names are inserted, with a single executemany.
+    """
+    pending = {}
+    for name, entity_type in entities:
+        if not name or not entity_type:
+            logging.error("Invalid entity name or type")
+            continue
+        pending.setdefault(name, entity_type) # First type seen wins, as with repeated get_or_create_entity calls
+    if not pending:
+        return {}
+
+    try:
+        with transaction() as (conn, cursor):
+            ids = _lookup_entity_ids(cursor, list(pending))
+            missing = [(name, entity_type) for name, entity_type in pending.items() if name not in ids]
+            if missing:
+                # DO NOTHING keeps the insert safe if another writer created a name meanwhile
+                cursor.executemany("""
+                INSERT INTO entities (name, type) VALUES (?, ?)
+                ON CONFLICT(name) DO NOTHING
+                """, missing)
+                ids.update(_lookup_entity_ids(cursor, [name for name, _ in missing]))
+        logging.debug(f"Resolved {len(ids)} entities ({len(missing)} created)")
+        return ids
+    except sqlite3.Error as e:
+        logging.error(f"Error resolving {len(pending)} entities: {e}")
+        return {}
+
+_LOOKUP_CHUNK = 500 # Stay well under SQLite's bound-parameter limit
+
+def _lookup_entity_ids(cursor: sqlite3.Cursor, names: List[str]) -> Dict[str, int]:
+    ids = {}
+    for i in range(0, len(names), _LOOKUP_CHUNK):
+        chunk = names[i:i + _LOOKUP_CHUNK]
+        cursor.execute(f"SELECT entity_id, name FROM entities WHERE name IN ({', '.join('?' * len(chunk))})", chunk)
+        ids.update((row['name'], row['entity_id']) for row in cursor.fetchall())
+    return ids
 
 def link_entry_entity(entry_id: int, entity_id: int, snippet: Optional[str] = None):
     """Creates a link between an entry and an entity."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    link_entry_entities(entry_id, [(entity_id, snippet)])
+
+def link_entry_entities(entry_id: int, links: List[Tuple[int, Optional[str]]]):
+    """Links an entry to several entities in one transaction.
+
+    Args:
+        entry_id: The entry being linked.
+        links: (entity_id, context_snippet) pairs.
+    """
+    if not links:
+        return
     try:
-        cursor.execute("""
-        INSERT INTO entry_entities (entry_id, entity_id, context_snippet)
-        VALUES (?, ?, ?)
-        ON CONFLICT(entry_id, entity_id) DO NOTHING;
-        """, (entry_id, entity_id, snippet))
-        conn.commit()
+        with transaction() as (conn, cursor):
+            cursor.executemany("""
+            INSERT INTO entry_entities (entry_id, entity_id, context_snippet)
+            VALUES (?, ?, ?)
+            ON CONFLICT(entry_id, entity_id) DO NOTHING;
+            """, [(entry_id, entity_id, snippet) for entity_id, snippet in links])
     except sqlite3.Error as e:
-        logging.error(f"Error linking entry {entry_id} to entity {entity_id}: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        logging.error(f"Error linking entry {entry_id} to {len(links)} entities: {e}")
 
-def get_entity_mentions(entity_id: int) -> List[Dict]:
+@dataclass
+class EntityMentions:
+    """An entity's mentions as parallel columns, in entry_date order."""
+    dates: List[str] = field(default_factory=list) # ISO entry dates, as stored
+    snippets: List[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+def get_entity_mentions(entity_id: int) -> EntityMentions:
     """Get all mentions of an entity with context."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
+    with read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None # Plain tuples; the rows are split into columns below
         cursor.execute("""
         SELECT e.entry_date, ee.context_snippet 
         FROM entry_entities ee
@@ -64,6 +114,8 @@ def get_entity_mentions(entity_id: int) -> List[Dict]:
         WHERE ee.entity_id = ?
         ORDER BY e.entry_date
         """, (entity_id,))
-        return [dict(row) for row in cursor.fetchall()]
-    finally:
-        conn.close()
+        rows = cursor.fetchall()
+    if not rows:
+        return EntityMentions()
+    dates, snippets = zip(*rows)
+    return EntityMentions(list(dates), list(snippets))
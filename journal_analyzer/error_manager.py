@@ -1,9 +1,19 @@
 import logging
-import json
+import orjson
+import threading
+import time
 import traceback
 from datetime import datetime, date
 from typing import Optional, List, Dict, Union
-from .database_manager import get_db_connection
+from .database_manager import transaction, read_connection, iso_date
+
+# Repeats of an error within this many seconds of its first logged occurrence
+# are stored without a traceback, pointing back at that first row instead
+ERROR_REPEAT_WINDOW = 60.0
+
+# (analysis_type, error_type, message) -> (first error_id, repeat count, first logged at)
+_recent_errors: Dict[tuple, tuple] = {}
+_recent_errors_lock = threading.Lock()
 
 def log_error(
     analysis_type: str,
@@ -14,16 +24,29 @@ def log_error(
     context: Dict = None
 ) -> int:
     """Log an analysis error with full context."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    key = (analysis_type, type(error).__name__, str(error))
+    now = time.monotonic()
+    with _recent_errors_lock:
+        recent = _recent_errors.get(key)
+        if recent and now - recent[2] < ERROR_REPEAT_WINDOW:
+            recent = _recent_errors[key] = (recent[0], recent[1] + 1, recent[2])
+        else:
+            recent = None
     
     error_details = {
         'error_type': type(error).__name__,
-        'traceback': traceback.format_exc(),
         'context': context or {}
     }
+    if recent:
+        # Same failure again: every occurrence still gets its own row (with
+        # its entry/period for retries), but the stack walk and formatting
+        # are only paid for the first one
+        error_details['repeat_of'] = recent[0]
+        error_details['repeat_count'] = recent[1]
+    else:
+        error_details['traceback'] = traceback.format_exc()
     
-    try:
+    with transaction() as (conn, cursor):
         cursor.execute("""
             INSERT INTO analysis_errors
             (analysis_type, entry_id, period_start, period_end, 
@@ -32,25 +55,28 @@ def log_error(
         """, (
             analysis_type,
             entry_id,
-            period_start,
-            period_end,
+            iso_date(period_start),
+            iso_date(period_end),
             str(error),
-            json.dumps(error_details)
+            orjson.dumps(error_details).decode() # TEXT, as the json_valid CHECK and json_extract index expect
         ))
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+        error_id = cursor.lastrowid
+    
+    if not recent:
+        with _recent_errors_lock:
+            if len(_recent_errors) >= 1024:
+                # Forget errors whose window has passed so the map stays small
+                for stale in [k for k, v in _recent_errors.items() if now - v[2] >= ERROR_REPEAT_WINDOW]:
+                    del _recent_errors[stale]
+            _recent_errors[key] = (error_id, 0, now)
+    return error_id
 
 def get_failed_analyses(
     analysis_type: str,
     include_resolved: bool = False
 ) -> List[Dict]:
     """Get all failed analyses of a specific type."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
+    with read_connection() as conn:
         query = """
             SELECT *
             FROM analysis_errors
@@ -60,10 +86,8 @@ def get_failed_analyses(
             query += " AND resolved = FALSE"
         query += " ORDER BY error_timestamp DESC"
         
-        cursor.execute(query, (analysis_type,))
+        cursor = conn.execute(query, (analysis_type,))
         return [dict(row) for row in cursor.fetchall()]
-    finally:
-        conn.close()
 
 def mark_resolved(
     error_ids: Union[int, List[int]],
@@ -73,26 +97,19 @@ def mark_resolved(
     if isinstance(error_ids, int):
         error_ids = [error_ids]
         
-    conn = get_db_connection()
-    try:
-        conn.executemany("""
+    with transaction() as (conn, cursor):
+        cursor.executemany("""
             UPDATE analysis_errors
             SET resolved = TRUE,
                 resolution_timestamp = CURRENT_TIMESTAMP,
                 resolution_notes = ?
             WHERE error_id = ?
         """, [(resolution_notes, error_id) for error_id in error_ids])
-        conn.commit()
-    finally:
-        conn.close()
 
 def get_error_summary() -> Dict:
     """Get summary of unresolved errors by type."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
+    with read_connection() as conn:
+        cursor = conn.execute("""
             SELECT 
                 analysis_type,
                 COUNT(*) as error_count,
@@ -104,6 +121,4 @@ def get_error_summary() -> Dict:
             WHERE resolved = FALSE
             GROUP BY analysis_type
         """)
-        return {row['analysis_type']: dict(row) for row in cursor.fetchall()}
-    finally:
-        conn.close() 
\ No newline at end of file
+        return {row['analysis_type']: dict(row) for row in cursor.fetchall()}
\ No newline at end of file
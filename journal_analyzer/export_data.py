@@ -2,13 +2,10 @@ import csv
 import sqlite3
 import logging
 from pathlib import Path
-from .database_manager import get_db_connection
+from .database_manager import read_connection
 
 def export_emotion_data(output_file='emotion_data.csv'):
     """Export emotional metrics to CSV file."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     try:
         # Get all emotional data with dates
         query = """
@@ -23,31 +20,35 @@ def export_emotion_data(output_file='emotion_data.csv'):
         ORDER BY entry_date
         """
         
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        if not rows:
-            logging.warning("No emotion data found to export")
-            return
-            
-        # Write to CSV
-        with open(output_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            # Write header
-            writer.writerow(['Date', 'Valence', 'Arousal', 'Entry Text'])
-            # Write data
-            writer.writerows(rows)
+        with read_connection() as conn:
+            cursor = conn.execute(query)
+            first = cursor.fetchone()
+            if first is None:
+                logging.warning("No emotion data found to export")
+                return
+
+            # Stream rows from the cursor straight into the CSV so memory
+            # stays flat however large the journal is
+            count, last = 1, first
+            with open(output_file, 'w', newline='', buffering=1 << 20) as f:
+                writer = csv.writer(f)
+                # Write header
+                writer.writerow(['Date', 'Valence', 'Arousal', 'Entry Text'])
+                # Write data
+                writer.writerow(first)
+                for row in cursor:
+                    writer.writerow(row)
+                    count += 1
+                    last = row
             
-        logging.info(f"Exported {len(rows)} entries to {output_file}")
+        logging.info(f"Exported {count} entries to {output_file}")
         
         # Print summary
-        print(f"\nExported {len(rows)} entries to {output_file}")
-        print(f"Date range: {rows[0][0]} to {rows[-1][0]}")
+        print(f"\nExported {count} entries to {output_file}")
+        print(f"Date range: {first[0]} to {last[0]}")
         
     except Exception as e:
         logging.error(f"Error exporting data: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     export_emotion_data() 
\ No newline at end of file
@@ -1,17 +1,28 @@
 import re
 from datetime import datetime
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from typing import Iterator, List, Tuple, Optional
 import logging
 
 from .config import JOURNAL_INPUT_FILE, DATE_FORMATS, DATE_HEADER_REGEX
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+_DATE_PATTERN = re.compile(DATE_HEADER_REGEX, re.IGNORECASE | re.MULTILINE)
+# Frozen at import so the formats _parse_date's cache was filled with can't change under it
+_DATE_FORMATS = tuple(DATE_FORMATS)
+
 def parse_date_string(date_str: str) -> Optional[datetime]:
     """Attempts to parse a date string using predefined formats."""
     # Clean up potential extra whitespace
-    date_str = date_str.strip()
-    for fmt in DATE_FORMATS:
+    return _parse_date(date_str.strip())
+
+@lru_cache(maxsize=8192)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    # Cached: journals repeat the same header style, and strptime is slow.
+    # Formats are always tried in DATE_FORMATS order so ambiguous strings
+    # keep resolving to the first format that fits
+    for fmt in _DATE_FORMATS:
         try:
             # Attempt to parse, return on first success
             return datetime.strptime(date_str, fmt)
@@ -32,67 +43,73 @@ def split_journal_entries(file_path: str = JOURNAL_INPUT_FILE) -> List[Tuple[dat
         A list of tuples, where each tuple contains (entry_date, entry_content).
         Entries with unparseable dates are skipped.
     """
-    entries = []
-    current_date = None
-    current_content = []
-    date_pattern = re.compile(DATE_HEADER_REGEX, re.IGNORECASE | re.MULTILINE)
+    entries = list(iter_journal_entries(file_path))
+    logging.info(f"Successfully parsed {len(entries)} entries from {file_path}.")
+    return entries
+
+def iter_journal_entries(file_path: str = JOURNAL_INPUT_FILE) -> Iterator[Tuple[datetime.date, str]]:
+    """
+    Yields (entry_date, entry_content) tuples from the journal text file.
 
+    The file is read whole and date headers are located with a single
+    finditer pass over the text; only the header lines are handled in Python,
+    and entry bodies are sliced straight out of the text.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            text = f.read()
     except FileNotFoundError:
         logging.error(f"Journal file not found: {file_path}")
-        return []
+        return
     except Exception as e:
         logging.error(f"Error reading journal file {file_path}: {e}")
-        return []
+        return
 
     logging.info(f"Starting parsing of {file_path}...")
-    line_num = 0
-    for line in lines:
-        line_num += 1
-        match = date_pattern.match(line)
-        if match:
-            # Found a potential date header
-            potential_date_str = match.group(0).strip()
-            parsed_date = parse_date_string(potential_date_str)
-
-            if parsed_date:
-                # Successfully parsed a date, this marks a new entry
-                # Save the previous entry if it exists
-                if current_date and current_content:
-                    entries.append((current_date, "".join(current_content).strip()))
-                    logging.debug(f"Completed entry for {current_date}")
-
-                # Start the new entry
-                current_date = parsed_date.date() # Store only the date part
-                current_content = [] # Reset content for the new entry
-                logging.debug(f"Found new entry date: {current_date} on line {line_num}")
-                # Don't add the date line itself to the content
-                continue # Move to the next line
-
-            else:
-                # Matched regex but couldn't parse - treat as content
-                logging.warning(f"Line {line_num} matched date regex but failed parsing: '{line.strip()}' - treating as content.")
-                if current_date: # Only add if we are already inside an entry
-                    current_content.append(line)
-
-        elif current_date:
-            # This line is part of the current entry's content
-            current_content.append(line)
-        else:
-            # Line before the first valid date header - skip or log if needed
-            logging.debug(f"Skipping line {line_num} before first valid date: '{line.strip()}'")
-
-
-    # Add the last entry after the loop finishes
-    if current_date and current_content:
-        entries.append((current_date, "".join(current_content).strip()))
+    current_date = None
+    body_start = 0 # Offset of the current entry's first content line
+    line_num = 1 # Line number of the header being handled, counted incrementally
+    counted_to = 0
+
+    for match in _DATE_PATTERN.finditer(text):
+        # A leading \s* in the regex can reach back over blank lines, so
+        # locate the line holding the match's first non-blank character and
+        # check it the way a line-by-line .match() would
+        header = match.group(0)
+        pos = match.start() + len(header) - len(header.lstrip())
+        line_start = text.rfind('\n', 0, pos) + 1
+        line_end = (text.find('\n', pos) + 1) or len(text)
+        line_num += text.count('\n', counted_to, line_start)
+        counted_to = line_start
+        line = text[line_start:line_end]
+
+        line_match = _DATE_PATTERN.match(line)
+        if not line_match:
+            continue
+
+        # Found a potential date header
+        parsed_date = parse_date_string(line_match.group(0).strip())
+        if not parsed_date:
+            # Matched regex but couldn't parse - leave it in the entry's content
+            logging.warning(f"Line {line_num} matched date regex but failed parsing: '{line.strip()}' - treating as content.")
+            continue
+
+        # Successfully parsed a date, this marks a new entry
+        # Emit the previous entry if it has any lines
+        if current_date and body_start < line_start:
+            yield current_date, text[body_start:line_start].strip()
+            logging.debug(f"Completed entry for {current_date}")
+
+        # Start the new entry after the date line itself
+        current_date = parsed_date.date() # Store only the date part
+        body_start = line_end
+        logging.debug(f"Found new entry date: {current_date} on line {line_num}")
+
+    # Emit the last entry; text before the first valid date header is skipped
+    if current_date and body_start < len(text):
+        yield current_date, text[body_start:].strip()
         logging.debug(f"Completed last entry for {current_date}")
 
-    logging.info(f"Successfully parsed {len(entries)} entries from {file_path}.")
-    return entries
-
 # Example usage (for testing)
 if __name__ == "__main__":
     parsed_entries = split_journal_entries()
@@ -1,12 +1,19 @@
 import os
+import atexit
+import json
 import logging
 import requests
-import json
-from typing import Optional, Dict, Literal
+from requests.adapters import HTTPAdapter
+import orjson
+from typing import Optional, Dict, Literal, Callable, Iterable
 from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 from enum import Enum
+from hashlib import blake2b
+from concurrent.futures import Future
+from functools import lru_cache
+import threading
 
 from .config import (
     DEFAULT_LLM_MODEL,
@@ -14,9 +21,32 @@ from .config import (
     CURRENT_LLM_BACKEND,
     CLI_SELECTED_MODEL
 )
+from .database_manager import get_cached_llm_response, cache_llm_response
 
 logging.basicConfig(level=logging.INFO)
 
+# Cache key -> response of the call currently fetching it, so concurrent
+# identical queries share one request instead of all missing the cache
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+# One keep-alive session for every Ollama call rather than a new connection
+# per request. Sized for the concurrent emotion batches in main.py
+_ollama_session = requests.Session()
+_ollama_session.mount("http://", HTTPAdapter(pool_maxsize=16))
+atexit.register(_ollama_session.close)
+
+# Fallback for responses whose outer-brace slice isn't valid JSON
+_JSON_DECODER = json.JSONDecoder()
+
+# Batch job statuses after which no more results will arrive; any other
+# status means the job is still running
+_BATCH_DONE_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Cached responses older than this are fetched again, so a model update or a
+# rare bad answer that slipped past the caller's check doesn't stick forever
+LLM_RESPONSE_CACHE_TTL_DAYS = 30
+
 class LLMBackend(Enum):
     """Enum for supported LLM backends."""
     LAMBDA = "lambda"
@@ -31,97 +61,79 @@ class LLMBackend(Enum):
             logging.warning(f"Invalid backend '{backend_str}'. Using Lambda API.")
             return cls.LAMBDA
 
-class LLMManager:
-    _instance = None
-    
-    def __new__(cls, model: str = DEFAULT_LLM_MODEL):
-        if cls._instance is None:
-            cls._instance = super(LLMManager, cls).__new__(cls)
-            cls._instance.model = model
-            cls._instance.backend = LLMBackend.from_string(CURRENT_LLM_BACKEND)
-            cls._instance.client = cls._instance._create_client() if cls._instance.backend == LLMBackend.LAMBDA else None
-        return cls._instance
-
-    def __init__(self, model: str = DEFAULT_LLM_MODEL):
-        # __new__ handles initialization
-        pass
-
-    def _create_client(self) -> OpenAI:
-        """Create and return a Lambda API client."""
-        api_key = os.getenv("LAMBDA_API_KEY")
-        if not api_key:
-            raise ValueError("LAMBDA_API_KEY not found in environment")
-            
-        return OpenAI(
-            api_key=api_key,
-            base_url="https://api.lambda.ai/v1"
-        )
-
-    def query_llm(self, prompt: str, temperature: float = 0.0) -> Optional[str]:
-        """
-        Send a query to Lambda's LLM API and return the response.
-        
-        Args:
-            prompt: The prompt to send
-            temperature: Controls randomness (0.0 for consistent responses)
-            
-        Returns:
-            The LLM's response as a string, or None if error
-        """
-        try:
-
-            # Send request to Lambda API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant analyzing journal entries."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature
-            )
-            
-            # Log token usage
-            if hasattr(response, 'usage'):
-                logging.info(f"Token usage: {response.usage.prompt_tokens} prompt + "
-                           f"{response.usage.completion_tokens} completion = "
-                           f"{response.usage.total_tokens} total")
-
-            return response.choices[0].message.content.strip()
-                
-        except Exception as e:
-            logging.error(f"Error querying Lambda API: {e}")
-            return None
-
 def get_active_model() -> str:
     """Get the currently active model, preferring CLI selection over backend default."""
     if CLI_SELECTED_MODEL:
         return CLI_SELECTED_MODEL
     return DEFAULT_LLM_MODEL[CURRENT_LLM_BACKEND]
 
-def query_llm(prompt: str) -> str:
-    """Query LLM using active model configuration."""
+def llm_cache_key(*parts: str) -> str:
+    """Cache key for an LLM result: a hash of the active backend and model and
+    everything else that shapes the result. Shared by every LLM cache."""
+    return blake2b("\0".join((CURRENT_LLM_BACKEND, get_active_model(), *parts)).encode(),
+                   digest_size=16).hexdigest()
+
+def query_llm(prompt: str, system: Optional[str] = None,
+              validate: Optional[Callable[[str], bool]] = None, use_cache: bool = True) -> str:
+    """Query LLM using active model configuration.
+
+    Args:
+        prompt: The user message
+        system: Static instructions sent as the system prompt, so the part
+            shared by every call forms a stable prefix; defaults to a generic
+            journal-analysis system prompt
+        validate: Accepts or rejects a response. Only accepted responses are
+            cached, so refusals and malformed output are retried on the next
+            run; without it nothing is cached
+        use_cache: False skips the cache lookup and always queries the
+            backend; an accepted response still replaces the cached one
+    """
     active_model = get_active_model()
     logging.debug(f"Using {CURRENT_LLM_BACKEND} backend with model: {active_model}")
     
+    # Repeat runs re-send identical prompts; answer those from the database
+    # instead of another network round trip
+    key = llm_cache_key(system or '', prompt)
+    if use_cache:
+        cached = get_cached_llm_response(key, LLM_RESPONSE_CACHE_TTL_DAYS)
+        if cached is not None:
+            logging.debug(f"LLM response cache hit for {key}")
+            return cached
+    
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        logging.debug(f"Waiting on in-flight LLM query {key}")
+        return future.result()
+    
+    try:
+        response = _query_backend(active_model, prompt, system)
+        if response and validate is not None and validate(response):
+            cache_llm_response(key, response)
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+def _query_backend(active_model: str, prompt: str, system: Optional[str]) -> Optional[str]:
+    """Sends one uncached query to the configured backend."""
     if CURRENT_LLM_BACKEND == 'lambda':
         # Use Lambda API
-        api_key = os.getenv('LAMBDA_API_KEY')
-        if not api_key:
-            logging.error("LAMBDA_API_KEY not found in environment")
+        client = _lambda_client()
+        if client is None:
             return None
-            
-        client = OpenAI(
-            api_key=api_key,
-            base_url="https://api.lambda.ai/v1"
-        )
         
         try:
             response = client.chat.completions.create(
                 model=active_model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant analyzing journal entries."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=_chat_messages(prompt, system),
                 temperature=0.0
             )
             return response.choices[0].message.content
@@ -132,17 +144,153 @@ def query_llm(prompt: str) -> str:
     else:
         # Ollama API call
         try:
-            response = requests.post('http://localhost:11434/api/generate', 
-                json={
-                    "model": active_model,
-                    "prompt": prompt
-                }
-            )
-            return response.json().get('response')
+            payload = {
+                "model": active_model,
+                "prompt": prompt
+            }
+            if system:
+                payload["system"] = system
+            # /api/generate streams NDJSON chunks by default; join their text
+            # as it arrives instead of waiting for the whole body
+            with _ollama_session.post('http://localhost:11434/api/generate',
+                                      json=payload, stream=True) as response:
+                response.raise_for_status()
+                return "".join(orjson.loads(line).get('response', '')
+                               for line in response.iter_lines() if line)
         except Exception as e:
             logging.error(f"Ollama API error: {e}")
             return None
 
+def _lambda_client() -> Optional[OpenAI]:
+    """Lambda API client, or None (logged) when no API key is configured."""
+    api_key = os.getenv('LAMBDA_API_KEY')
+    if not api_key:
+        logging.error("LAMBDA_API_KEY not found in environment")
+        return None
+    return _openai_client(api_key, "https://api.lambda.ai/v1")
+
+@lru_cache(maxsize=1)
+def _openai_client(api_key: str, base_url: str) -> OpenAI:
+    # One client per key, shared by every call and thread, so its keep-alive
+    # connection pool is reused instead of a new TLS handshake per query
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+def _chat_messages(prompt: str, system: Optional[str]) -> list:
+    return [
+        {"role": "system", "content": system or "You are a helpful assistant analyzing journal entries."},
+        {"role": "user", "content": prompt}
+    ]
+
+def submit_batch(prompts: Dict[str, str], system: Optional[str] = None) -> Optional[str]:
+    """Submit prompts as an offline batch job, billed at the batch rate.
+
+    Args:
+        prompts: custom_id -> user message; each becomes one chat completion request
+        system: System prompt shared by every request
+
+    Returns:
+        The batch id to pass to collect_batch, or None if submission failed
+    """
+    if CURRENT_LLM_BACKEND != 'lambda':
+        logging.error(f"Offline batch jobs are not supported by the {CURRENT_LLM_BACKEND} backend")
+        return None
+    client = _lambda_client()
+    if client is None:
+        return None
+    
+    active_model = get_active_model()
+    requests_jsonl = b"\n".join(orjson.dumps({
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": active_model, "messages": _chat_messages(prompt, system), "temperature": 0.0}
+    }) for custom_id, prompt in prompts.items())
+    
+    try:
+        batch_file = client.files.create(file=("batch_requests.jsonl", requests_jsonl), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logging.info(f"Submitted batch {batch.id} with {len(prompts)} requests")
+        return batch.id
+    except Exception as e:
+        logging.error(f"Lambda batch submission error: {e}")
+        return None
+
+def collect_batch(batch_id: str) -> Optional[Dict[str, Optional[str]]]:
+    """Fetch the responses of a finished batch job.
+
+    Returns:
+        custom_id -> response text (None for requests that failed), or None
+        if the batch is still running or couldn't be read. A batch that
+        failed, expired or was cancelled is logged as an error and returns
+        whatever responses it produced, possibly none
+    """
+    client = _lambda_client()
+    if client is None:
+        return None
+    
+    try:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status not in _BATCH_DONE_STATUSES:
+            logging.info(f"Batch {batch_id} is {batch.status}")
+            return None
+        if batch.status != "completed":
+            logging.error(f"Batch {batch_id} {batch.status}: {batch.errors}")
+        # Successful requests are written to the output file and failed ones
+        # to the error file; either is missing when it would be empty
+        outputs = [client.files.content(file_id).content
+                   for file_id in (batch.output_file_id, batch.error_file_id) if file_id]
+    except Exception as e:
+        logging.error(f"Lambda batch retrieval error: {e}")
+        return None
+    
+    responses = {}
+    for line in b"\n".join(outputs).splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        try:
+            responses[record["custom_id"]] = record["response"]["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            logging.warning(f"Batch {batch_id} has no response for {record.get('custom_id')}: {record.get('error')}")
+            responses[record["custom_id"]] = None
+    return responses
+
+def _extract_json_object(response: str):
+    """Decodes the first JSON value embedded in response; raises ValueError if there is none."""
+    if not response:
+        raise ValueError("Empty response from LLM")
+        
+    # Extract JSON if it's embedded in other text
+    json_start = response.find('{')
+    json_end = response.rfind('}') + 1
+    
+    if json_start < 0 or json_end <= json_start:
+        raise ValueError("No JSON object found in response")
+    try:
+        return orjson.loads(response[json_start:json_end])
+    except orjson.JSONDecodeError:
+        # Trailing prose with braces of its own (a second object, an
+        # aside in {}) breaks the outer slice; decode just the first
+        # complete object, which stops where that object ends
+        return _JSON_DECODER.raw_decode(response, json_start)[0]
+
+def json_fields_validator(required_fields: Iterable[str] = ()) -> Callable[[str], bool]:
+    """Builds a validator accepting responses that contain a JSON object with
+    every one of required_fields."""
+    required_fields = tuple(required_fields)
+    
+    def validate(response: str) -> bool:
+        try:
+            result = _extract_json_object(response)
+        except ValueError:
+            return False
+        return isinstance(result, dict) and all(field in result for field in required_fields)
+    return validate
+
 def parse_llm_json_response(response: str, required_fields: list = None, defaults: dict = None) -> Dict:
     """Parse JSON from LLM response with validation and defaults.
     
@@ -155,18 +303,7 @@ def parse_llm_json_response(response: str, required_fields: list = None, default
         Parsed and validated JSON dictionary
     """
     try:
-        if not response:
-            raise ValueError("Empty response from LLM")
-            
-        # Extract JSON if it's embedded in other text
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            json_str = response[json_start:json_end]
-            result = json.loads(json_str)
-        else:
-            raise ValueError("No JSON object found in response")
+        result = _extract_json_object(response)
             
         # Validate and set defaults if specified
         if required_fields and defaults:
@@ -2,23 +2,37 @@ import logging
 from pathlib import Path
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Any
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice, chain
 import argparse
 import os
 
-from .journal_parser import split_journal_entries
+from .journal_parser import iter_journal_entries
 from .emotion_analyzer import LLMEmotionAnalyzer
 from .database_manager import (
     create_tables, 
     store_emotion_analysis,
+    store_emotion_analyses,
     get_db_connection,
-    insert_entry
+    insert_entry,
+    insert_entries,
+    analyze_tables
 )
-from .quantitative_analyzer import calculate_metrics
+from .quantitative_analyzer import calculate_metrics, load_models
 from .temporal_analyzer import analyze_time_period, analyze_full_journal, store_temporal_analysis
 from .config import JOURNAL_INPUT_FILE, DATA_DIR, DEFAULT_LLM_BACKEND, CURRENT_LLM_BACKEND, DEFAULT_LLM_MODEL
 from .pronoun_analyzer import analyze_pronouns
 
+# Entries inserted per SQLite transaction during batch processing
+ENTRY_BATCH_SIZE = 100
+# Inserted batches whose emotion analysis may run at once while later batches
+# are inserted; each sends up to EMOTION_CONCURRENCY prompts at a time, so
+# this times that bounds the requests in flight
+EMOTION_PIPELINE_DEPTH = 4
+
 # Set logging configuration once at the module level
 logging.basicConfig(
     level=logging.INFO,
@@ -30,11 +44,21 @@ def setup_database():
     logging.info("Setting up database...")
     create_tables()  # This should now show our detailed logging
 
-def process_single_entry(date: datetime.date, content: str, backend: str = "lambda") -> Optional[int]:
+def _calculate_entry_metrics(entry: Tuple[datetime.date, str]):
+    """Pool worker: run the CPU-bound standard library analysis for one entry."""
+    date, content = entry
+    return date, content, calculate_metrics(content)
+
+def process_single_entry(date: datetime.date, content: str, backend: str = "lambda",
+                         precomputed_metrics: Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]] = None,
+                         analyzer: Optional[LLMEmotionAnalyzer] = None) -> Optional[int]:
     """Process a single journal entry with all analysis methods."""
     try:
         # Standard library analysis - get both metrics and pronoun_metrics
-        metrics, pronoun_metrics = calculate_metrics(content)
+        if precomputed_metrics:
+            metrics, pronoun_metrics = precomputed_metrics
+        else:
+            metrics, pronoun_metrics = calculate_metrics(content)
         
         # Store basic entry and get entry_id using pronoun_metrics from calculate_metrics
         entry_id = insert_entry(date, content, metrics, pronoun_metrics)
@@ -43,8 +67,7 @@ def process_single_entry(date: datetime.date, content: str, backend: str = "lamb
             raise ValueError("Failed to insert entry")
             
         # LLM emotion analysis - only pass text content
-        emotion_analyzer = LLMEmotionAnalyzer()
-        emotion_results = emotion_analyzer.analyze_emotion(text=content)
+        emotion_results = _analyze_entry_emotions(content, analyzer)
         store_emotion_analysis(entry_id, emotion_results)
         
         return entry_id
@@ -53,44 +76,106 @@ def process_single_entry(date: datetime.date, content: str, backend: str = "lamb
         logging.error(f"Error processing entry from {date}: {e}")
         return None
 
-def batch_process_entries(journal_path: str = None):
-    """Process all entries in journal file."""
+def _analyze_entry_emotions(content: str, analyzer: Optional[LLMEmotionAnalyzer] = None) -> Optional[Dict]:
+    """Run the LLM emotion analysis for an entry's text."""
+    emotion_analyzer = analyzer or LLMEmotionAnalyzer()
+    return emotion_analyzer.analyze_emotion(text=content)
+
+def batch_process_entries(journal_path: str = None, offline: bool = False):
+    """Process all entries in journal file.
+
+    With offline=True the entries are inserted and their emotion analysis is
+    submitted as one offline batch job instead of interactive requests; store
+    its results later with collect_emotion_batch.
+    """
     if not journal_path:
         logging.error("No journal path provided")
         return
         
     try:
-        # Parse entries from file
-        entries = split_journal_entries(journal_path)
-        if not entries:
+        # Parse entries from file lazily, so metrics and inserts start while
+        # the rest of the journal is still being split
+        entries = iter_journal_entries(journal_path)
+        first = next(entries, None)
+        if first is None:
             logging.error("No entries found in journal")
             return
+        entries = chain([first], entries)
             
         # Initialize counters
-        total = len(entries)  # Define total here
         processed = 0
         failed = 0
         
-        logging.info(f"Found {total} entries to process")
+        # Metrics are CPU-bound and independent per entry, so compute them in
+        # worker processes; imap keeps journal order for the inserts below.
+        # Load the models once here so forked workers inherit them
+        load_models()
+        # One analyzer shared by every batch
+        analyzer = LLMEmotionAnalyzer()
+        # (batch size, future of its emotion analyses), oldest first
+        pending = deque()
+        # (entry_id, content) left for the offline batch job
+        offline_entries = []
         
-        # Process each entry
-        for date, content in entries:
+        def store_oldest():
+            nonlocal processed, failed
+            size, future = pending.popleft()
             try:
-                entry_id = process_single_entry(date, content)
-                
-                # Update counters
-                if entry_id:
-                    processed += 1
-                    # Log progress periodically
-                    if processed % 10 == 0:
-                        logging.info(f"Processed {processed}/{total} entries")
-                else:
-                    failed += 1
-                    logging.warning(f"Entry for {date} was not processed (no entry_id returned)")
-                    
+                analyses = future.result()
             except Exception as e:
-                failed += 1
-                logging.error(f"Failed to process entry {date}: {e}")
+                # One failed batch doesn't stop the batches inserted around it
+                logging.error(f"Emotion analysis of a batch of {size} entries failed: {e}")
+                failed += size
+                return
+            # Store the batch's emotion analyses in one transaction; entries
+            # whose analysis failed have nothing to store and count as failed
+            stored = len(store_emotion_analyses([(entry_id, analysis) for entry_id, analysis in analyses.items()
+                                                 if analysis is not None]))
+            
+            # Update counters
+            processed += stored
+            failed += size - stored
+            # Log progress periodically
+            logging.info(f"Processed {processed} entries ({failed} failed)")
+        
+        with Pool(os.cpu_count()) as pool, ThreadPoolExecutor(EMOTION_PIPELINE_DEPTH) as llm_pool:
+            results = pool.imap(_calculate_entry_metrics, entries, chunksize=8)
+            # Insert ENTRY_BATCH_SIZE entries per transaction instead of one commit each
+            while batch := list(islice(results, ENTRY_BATCH_SIZE)):
+                entry_ids = insert_entries([(date, content, *entry_metrics)
+                                            for date, content, entry_metrics in batch])
+                if not entry_ids:
+                    failed += len(batch)
+                    logging.warning(f"Batch of {len(batch)} entries from {batch[0][0]} was not inserted")
+                    continue
+                
+                if offline:
+                    offline_entries.extend(zip(entry_ids, (content for _, content, _ in batch)))
+                    continue
+                
+                # Several entries per LLM prompt rather than one call each,
+                # analyzed in the background while the next batches are inserted
+                pending.append((len(batch), llm_pool.submit(
+                    analyzer.analyze_emotion_batch,
+                    [(entry_id, content) for (_, content, _), entry_id in zip(batch, entry_ids)])))
+                if len(pending) > EMOTION_PIPELINE_DEPTH:
+                    store_oldest()
+            
+            while pending:
+                store_oldest()
+        
+        if offline_entries:
+            batch_id, cached = analyzer.submit_emotion_batch(offline_entries)
+            processed += len(store_emotion_analyses(list(cached.items())))
+            if batch_id:
+                logging.info(f"Submitted emotion analysis of {len(offline_entries) - len(cached)} entries "
+                             f"as batch {batch_id}; store it with --collect-batch {batch_id}")
+            elif len(cached) < len(offline_entries):
+                failed += len(offline_entries) - len(cached)
+                logging.error("Emotion analysis batch job was not submitted")
+        
+        # Refresh planner statistics now that the tables have grown
+        analyze_tables()
         
         # Final status
         logging.info(f"Processing complete. Successful: {processed}, Failed: {failed}")
@@ -100,6 +185,22 @@ def batch_process_entries(journal_path: str = None):
         logging.error(f"Batch processing failed: {e}")
         return 0, 0
 
+def collect_emotion_batch(batch_id: str) -> Optional[Tuple[int, int]]:
+    """Store the emotion analyses of a finished offline batch job.
+
+    Returns:
+        (stored, failed) counts, or None if the job hasn't finished; a job
+        that failed, expired or was cancelled counts whatever it produced
+    """
+    analyses = LLMEmotionAnalyzer().collect_emotion_batch(batch_id)
+    if analyses is None:
+        logging.info(f"Batch {batch_id} has no results yet")
+        return None
+    
+    stored = len(store_emotion_analyses(list(analyses.items())))
+    logging.info(f"Stored {stored} emotion analyses from batch {batch_id}; {len(analyses) - stored} failed")
+    return stored, len(analyses) - stored
+
 def run_temporal_analysis(query: str):
     """
     Run analysis across time periods and full journal for a single query.
@@ -140,6 +241,10 @@ def main():
                        default=DEFAULT_LLM_BACKEND,
                        help=f'LLM backend to use (default: {DEFAULT_LLM_BACKEND})')
     parser.add_argument('--model', help='Override default model name')
+    parser.add_argument('--offline-batch', action='store_true',
+                       help='With --process, submit emotion analysis as an offline batch job')
+    parser.add_argument('--collect-batch', metavar='BATCH_ID',
+                       help='Store the results of a finished offline batch job')
     
     args = parser.parse_args()
     
@@ -154,7 +259,10 @@ def main():
         setup_database()
     
     if args.process or args.all:
-        batch_process_entries()  # No backend parameter needed
+        batch_process_entries(JOURNAL_INPUT_FILE, offline=args.offline_batch)  # No backend parameter needed
+    
+    if args.collect_batch:
+        collect_emotion_batch(args.collect_batch)
     
     if args.analyze or args.all:
         # Prompt for query if analyze flag is set
@@ -0,0 +1,72 @@
+import os
+import queue
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+class SQLiteConnectionPool:
+    """
+    Bounded pool of configured SQLite connections.
+
+    Connections are created by `factory` (so every PRAGMA is applied once per
+    connection, not once per call) and handed back with release() instead of
+    being closed. Connections are never shared across processes: a pool used
+    after fork() starts over with fresh connections.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], size: int = 4):
+        self._factory = factory
+        self._size = size
+        self._pid = os.getpid()
+        self._idle = queue.Queue(maxsize=size)
+        self._used = False
+
+    @property
+    def used(self) -> bool:
+        """Whether this process has acquired a connection from the pool."""
+        # A forked child inherits the flag but none of the parent's use
+        return self._used and os.getpid() == self._pid
+
+    def acquire(self) -> sqlite3.Connection:
+        """Returns an idle connection, opening a new one if none is free."""
+        if os.getpid() != self._pid:
+            # Inherited from the parent process; don't touch its connections
+            self._pid = os.getpid()
+            self._idle = queue.Queue(maxsize=self._size)
+        self._used = True
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._factory()
+
+    def release(self, conn: sqlite3.Connection):
+        """Returns a connection to the pool, closing it if the pool is full."""
+        if conn.in_transaction:
+            # Never hand out a connection with someone else's uncommitted work
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager form of acquire()/release()."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.warning(f"Error closing pooled connection: {e}")
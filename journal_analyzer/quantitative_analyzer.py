@@ -1,42 +1,48 @@
-import nltk
-import textstat
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from collections import Counter
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
 import logging
-import spacy # Using spacy for tokenization might be more robust
 
 from .config import PRONOUN_CATEGORIES
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- Initialization ---
-try:
-    # Ensure NLTK data is available (run once)
-    # nltk.download('punkt', quiet=True)
-    # nltk.download('averaged_perceptron_tagger', quiet=True) # Needed for some pronoun methods if not using spaCy
-    pass # Assume downloaded if using regularly
-except Exception as e:
-    logging.warning(f"NLTK download check failed (might need manual download): {e}")
-
-# Initialize VADER sentiment analyzer
-vader_analyzer = SentimentIntensityAnalyzer()
-
-# Load spaCy model (more robust tokenization and POS tagging)
-try:
-    nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"]) # Disable unused components for speed
-    logging.info("spaCy model 'en_core_web_sm' loaded successfully.")
-except OSError:
-    logging.error("spaCy model 'en_core_web_sm' not found. Please run: python -m spacy download en_core_web_sm")
-    nlp = None # Fallback or raise error? For now, allow fallback but warn heavily.
-except Exception as e:
-    logging.error(f"Error loading spaCy model: {e}")
-    nlp = None
+# Tokenization is handled by textstat (counts) and spaCy (pronouns); NLTK's
+# Punkt models are not needed and are no longer imported.
+# textstat, VADER and spaCy are imported on first use so that importing this
+# module (e.g. via journal_analyzer.main for --analyze) stays cheap.
+
+@lru_cache(maxsize=None)
+def get_vader_analyzer():
+    """Initialize VADER sentiment analyzer on first use."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+@lru_cache(maxsize=None)
+def get_nlp():
+    """Load spaCy model (more robust tokenization and POS tagging) on first use; None if unavailable."""
+    try:
+        import spacy
+        nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"]) # Disable unused components for speed
+        logging.info("spaCy model 'en_core_web_sm' loaded successfully.")
+        return nlp
+    except OSError:
+        logging.error("spaCy model 'en_core_web_sm' not found. Please run: python -m spacy download en_core_web_sm")
+        return None # Fallback or raise error? For now, allow fallback but warn heavily.
+    except Exception as e:
+        logging.error(f"Error loading spaCy model: {e}")
+        return None
+
+def load_models():
+    """Load the analysis models now, e.g. in a parent process before forking workers."""
+    get_vader_analyzer()
+    get_nlp()
 
 # --- Helper Functions ---
 def get_sentiment_vader(text: str) -> Tuple[float, str]:
     """Calculates VADER sentiment compound score and assigns a label."""
-    vs = vader_analyzer.polarity_scores(text)
+    vs = get_vader_analyzer().polarity_scores(text)
     score = vs['compound']
     if score >= 0.05:
         label = 'positive'
@@ -111,6 +117,8 @@ def calculate_metrics(text: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, An
         logging.warning("calculate_metrics received empty or invalid text.")
         return metrics, pronoun_metrics
 
+    import textstat
+
     try:
         # Basic Text Stats
         metrics['word_count'] = textstat.lexicon_count(text, removepunct=True)
@@ -136,6 +144,7 @@ def calculate_metrics(text: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, An
             # Already has default values
 
         # Pronoun Usage (using spaCy) - with error handling
+        nlp = get_nlp()
         if nlp:
             try:
                 doc = nlp(text)
@@ -163,7 +172,7 @@ if __name__ == "__main__":
 
     These two statements relaxed me in an important way. I am still feeling a lot of internal pressure to construct and commit to a relationship model, not just a mode of interaction but an identity and a philosophy too. A few days ago I advised myself to philosophize less and love more. I'd expand that statement now to say, "Let your philosophy and identity grow out of your choices. You can love [FemaleName259] in your way. Your ideals don't have to match hers or anyone else's. Remain sensitive to what you want in this moment."
     """
-    if nlp: # Only run example if spaCy loaded
+    if get_nlp(): # Only run example if spaCy loaded
         general_metrics, p_metrics = calculate_metrics(sample_text)
         print("--- General Metrics ---")
         for k, v in general_metrics.items():
@@ -2,11 +2,20 @@ from typing import List, Dict, Optional
 import logging
 from datetime import datetime, timedelta, date
 import json
+import orjson
 
-from .llm_manager import query_llm, parse_llm_json_response
+from .llm_manager import query_llm, parse_llm_json_response, json_fields_validator
 from .database_manager import get_db_connection
 from .error_manager import log_error
 
+def _is_json(response: str) -> bool:
+    """query_llm validator matching the strict orjson.loads parsing of period analyses."""
+    try:
+        orjson.loads(response)
+        return True
+    except orjson.JSONDecodeError:
+        return False
+
 def get_entries_for_period(start_date: datetime, end_date: datetime) -> List[Dict]:
     """Retrieve entries for a specific time period."""
     conn = get_db_connection()
@@ -92,11 +101,11 @@ def analyze_time_period(period_type: str, query_or_queries, start_date: date = N
             """
             
             try:
-                response = query_llm(prompt)
+                response = query_llm(prompt, validate=_is_json)
                 if response:
                     # Add defensive JSON parsing
                     try:
-                        results[query] = json.loads(response)
+                        results[query] = orjson.loads(response)
                     except json.JSONDecodeError as e:
                         logging.error(f"JSON parsing error for query '{query[:50]}...': {e}")
                         results[query] = {"error": f"JSON parsing error: {e}", "raw_response": response}
@@ -178,10 +187,10 @@ def analyze_full_journal(query: str) -> Dict:
         """
         
         try:
-            response = query_llm(prompt)
+            response = query_llm(prompt, validate=_is_json)
             if response:
                 try:
-                    return json.loads(response)
+                    return orjson.loads(response)
                 except json.JSONDecodeError as e:
                     logging.error(f"JSON parsing error in full journal analysis: {e}")
                     return {"error": f"JSON parsing error: {e}", "raw_response": response}
@@ -208,7 +217,7 @@ def store_temporal_analysis(period: str, results: Dict):
             results.get('period_start'),
             results.get('period_end'),
             f"Temporal analysis for {period}",
-            json.dumps(results),
+            orjson.dumps(results).decode(),
             "ollama_default"
         ))
         conn.commit()
@@ -266,14 +275,23 @@ def analyze_with_context(
                 if result:
                     columns = [description[0] for description in cursor.description]
                     result_dict = dict(zip(columns, result))
-                    previous_analyses[ref] = json.loads(result_dict['llm_response'])
+                    previous_analyses[ref] = orjson.loads(result_dict['llm_response'])
 
         # Build prompt with context
         prompt = construct_prompt(query, entries, previous_analyses)
         logging.debug(f"Found {len(entries) if entries else 0} entries")  # Debug entries
         
+        required_fields = ['emotional_trajectory', 'recurring_patterns', 'growth_areas', 'key_triggers', 'recommendations']
+        defaults = {
+            'emotional_trajectory': 'No clear trajectory detected',
+            'recurring_patterns': [],
+            'growth_areas': [],
+            'key_triggers': [],
+            'recommendations': []
+        }
+        
         # Get LLM response
-        response = query_llm(prompt)
+        response = query_llm(prompt, validate=json_fields_validator(required_fields))
         logging.debug(f"LLM raw response: {response}")
         if not response:
             logging.error("Failed to get LLM response")
@@ -298,15 +316,6 @@ def analyze_with_context(
         conn.commit()
         
         # Try to parse as JSON if it's in JSON format, otherwise return raw
-        required_fields = ['emotional_trajectory', 'recurring_patterns', 'growth_areas', 'key_triggers', 'recommendations']
-        defaults = {
-            'emotional_trajectory': 'No clear trajectory detected',
-            'recurring_patterns': [],
-            'growth_areas': [],
-            'key_triggers': [],
-            'recommendations': []
-        }
-        
         result = parse_llm_json_response(response, required_fields, defaults)
         
         return result
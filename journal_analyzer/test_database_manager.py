@@ -0,0 +1,99 @@
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+PRONOUNS = {'first_singular': {'count': 3, 'percentage': 1.5}}
+
+def _count(db, table):
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_insert_entries_returns_ids_in_order(db):
+    entry_ids = db.insert_entries([
+        (date(2020, 1, 2), "First entry.", {'word_count': 2}, PRONOUNS),
+        (date(2020, 5, 17), "Second entry.", {'word_count': 2}, {}),
+    ])
+    assert len(entry_ids) == 2 and entry_ids[0] < entry_ids[1]
+    assert _count(db, 'entries') == 2
+    assert _count(db, 'pronoun_usage') == 1
+
+def test_insert_entries_rolls_back_whole_batch(db):
+    bad_pronouns = {'first_singular': {'count': None, 'percentage': 1.0}}  # count is NOT NULL
+    entry_ids = db.insert_entries([
+        (date(2020, 1, 2), "Fine entry.", {}, PRONOUNS),
+        (date(2020, 1, 3), "Bad entry.", {}, bad_pronouns),
+    ])
+    assert entry_ids == []
+    assert _count(db, 'entries') == 0
+    assert _count(db, 'pronoun_usage') == 0
+
+def test_insert_entries_fills_period_columns(db):
+    db.insert_entries([
+        (date(2020, 1, 2), "A Thursday.", {}, {}),
+        (date(2021, 1, 3), "A Sunday in ISO week 53 of 2020.", {}, {}),
+    ])
+    conn = sqlite3.connect(db.DB_PATH)
+    rows = conn.execute("SELECT year, quarter, month, week_of_year, day_of_week FROM entries "
+                        "ORDER BY entry_id").fetchall()
+    conn.close()
+    assert rows == [(2020, 1, 1, 1, 3), (2021, 1, 1, 53, 6)]
+
+def test_insert_entries_into_legacy_schema_without_setup(db, tmp_path, monkeypatch):
+    # A database from before the period fields became generated columns,
+    # written to without create_tables running in this process
+    legacy_path = tmp_path / 'legacy.db'
+    conn = sqlite3.connect(legacy_path)
+    conn.execute("""
+    CREATE TABLE entries (
+        entry_id INTEGER PRIMARY KEY AUTOINCREMENT, entry_date DATE NOT NULL, content TEXT NOT NULL,
+        word_count INTEGER, sentence_count INTEGER, avg_sentence_length REAL,
+        reading_level_flesch REAL, sentiment_score_vader REAL, sentiment_label_vader TEXT,
+        year INTEGER NOT NULL, quarter INTEGER NOT NULL, month INTEGER NOT NULL,
+        week_of_year INTEGER NOT NULL, day_of_week INTEGER NOT NULL)""")
+    conn.execute("""
+    CREATE TABLE pronoun_usage (
+        usage_id INTEGER PRIMARY KEY AUTOINCREMENT, entry_id INTEGER NOT NULL,
+        pronoun_category TEXT NOT NULL, count INTEGER NOT NULL, percentage REAL NOT NULL)""")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, 'DB_PATH', legacy_path)
+    monkeypatch.setattr(db, '_pool', db.SQLiteConnectionPool(db.get_db_connection))
+    monkeypatch.setattr(db, '_legacy_entries', None)
+
+    assert len(db.insert_entries([(date(2021, 12, 30), "Old schema.", {}, PRONOUNS)])) == 1
+    conn = sqlite3.connect(legacy_path)
+    assert conn.execute("SELECT year, quarter, month, week_of_year FROM entries").fetchone() == (2021, 4, 12, 52)
+    conn.close()
+
+def test_llm_response_cache_expiry_and_replace(db):
+    db.cache_llm_response('key', 'first')
+    assert db.get_cached_llm_response('key') == 'first'
+    assert db.get_cached_llm_response('key', max_age_days=30) == 'first'
+
+    with db.transaction() as (conn, cursor):
+        cursor.execute("UPDATE llm_response_cache SET created_at = datetime('now', '-31 days')")
+    assert db.get_cached_llm_response('key', max_age_days=30) is None
+
+    db.cache_llm_response('key', 'second')
+    assert db.get_cached_llm_response('key', max_age_days=30) == 'second'
+    assert db.get_cached_llm_response('missing') is None
+
+def test_import_alone_does_not_create_database(tmp_path):
+    # close_pool runs at exit; a process that never touched the database
+    # must not open (and so create) the file
+    package_dir = Path(__file__).resolve().parent
+    script = f"""
+import sys, types
+config = types.ModuleType('journal_analyzer.config')
+config.DB_PATH = {str(tmp_path / 'unused.db')!r}
+sys.modules['journal_analyzer.config'] = config
+import journal_analyzer.database_manager
+"""
+    subprocess.run([sys.executable, '-c', script], cwd=package_dir.parent, check=True)
+    assert not (tmp_path / 'unused.db').exists()
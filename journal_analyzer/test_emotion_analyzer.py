@@ -0,0 +1,88 @@
+import orjson
+import pytest
+
+from journal_analyzer import emotion_analyzer, llm_manager
+from journal_analyzer.emotion_analyzer import LLMEmotionAnalyzer
+
+def _analysis(valence, **fields):
+    analysis = {'valence': valence, 'arousal': 4.0, 'primary_emotions': ['calm'],
+                'emotional_patterns': 'steady', 'confidence': 0.9, 'reasoning': 'test'}
+    analysis.update(fields)
+    return orjson.dumps(analysis).decode()
+
+@pytest.fixture
+def llm(db, monkeypatch):
+    """Scripted query_llm: pops the next response per call and records the prompts."""
+    monkeypatch.setattr(llm_manager, 'get_active_model', lambda: 'test-model')
+    monkeypatch.setattr(emotion_analyzer, 'get_cached_llm_result', db.get_cached_llm_result)
+    monkeypatch.setattr(emotion_analyzer, 'cache_llm_result', db.cache_llm_result)
+    emotion_analyzer._load_cached_emotion.cache_clear()
+    prompts = []
+    responses = []
+
+    def query_llm(prompt, system=None, validate=None, use_cache=True):
+        prompts.append(prompt)
+        return responses.pop(0)
+    monkeypatch.setattr(emotion_analyzer, 'query_llm', query_llm)
+    yield prompts, responses
+    emotion_analyzer._load_cached_emotion.cache_clear()
+
+def test_analyze_emotion_caches_complete_result(llm):
+    prompts, responses = llm
+    responses.append(_analysis(7.0))
+    analyzer = LLMEmotionAnalyzer()
+    assert analyzer.analyze_emotion("A good day.")['valence'] == 7.0
+
+    emotion_analyzer._load_cached_emotion.cache_clear()  # hit the database, not the lru_cache
+    assert analyzer.analyze_emotion("A good day.")['valence'] == 7.0
+    assert len(prompts) == 1
+
+def test_analyze_emotion_does_not_cache_default_filled_result(llm):
+    prompts, responses = llm
+    responses.extend(['{"valence": 7.0}', _analysis(6.0)])
+    analyzer = LLMEmotionAnalyzer()
+    # Missing fields are filled from EMOTION_DEFAULTS, but not remembered
+    assert analyzer.analyze_emotion("A day.")['arousal'] == emotion_analyzer.EMOTION_DEFAULTS['arousal']
+    assert analyzer.analyze_emotion("A day.")['valence'] == 6.0
+    assert len(prompts) == 2
+
+def test_analyze_emotion_failure_is_not_cached(llm):
+    prompts, responses = llm
+    responses.extend(["No JSON here", _analysis(3.0)])
+    analyzer = LLMEmotionAnalyzer()
+    assert analyzer.analyze_emotion("A day.") is None
+    assert analyzer.analyze_emotion("A day.")['valence'] == 3.0
+
+def test_batch_splits_outputs_by_number(llm):
+    prompts, responses = llm
+    responses.append(f"Here you go.\nOutput #2: {_analysis(2.0)}\nOutput #1: {_analysis(1.0)}")
+    results = LLMEmotionAnalyzer().analyze_emotion_batch([(10, "first"), (20, "second")])
+    assert {entry_id: result['valence'] for entry_id, result in results.items()} == {10: 1.0, 20: 2.0}
+    assert len(prompts) == 1
+
+def test_batch_falls_back_to_single_analysis(llm):
+    prompts, responses = llm
+    # Entry 2's output is missing from the batched response
+    responses.extend([f"Output #1: {_analysis(1.0)}", _analysis(2.0)])
+    results = LLMEmotionAnalyzer().analyze_emotion_batch([(10, "first"), (20, "second")])
+    assert results[10]['valence'] == 1.0
+    assert results[20]['valence'] == 2.0
+    assert "second" in prompts[1] and "first" not in prompts[1]
+
+def test_batch_reuses_cached_entries(llm):
+    prompts, responses = llm
+    responses.extend([_analysis(1.0), f"Output #1: {_analysis(2.0)}"])
+    analyzer = LLMEmotionAnalyzer()
+    analyzer.analyze_emotion("first")
+    results = analyzer.analyze_emotion_batch([(10, "first"), (20, "second")])
+    assert results[10]['valence'] == 1.0
+    assert results[20]['valence'] == 2.0
+    # Only the uncached entry went into the batched prompt
+    assert "second" in prompts[1] and "first" not in prompts[1]
+
+def test_cache_key_includes_backend(monkeypatch):
+    monkeypatch.setattr(llm_manager, 'get_active_model', lambda: 'test-model')
+    monkeypatch.setattr(llm_manager, 'CURRENT_LLM_BACKEND', 'lambda')
+    lambda_key = emotion_analyzer._emotion_cache_key("text")
+    monkeypatch.setattr(llm_manager, 'CURRENT_LLM_BACKEND', 'ollama')
+    assert emotion_analyzer._emotion_cache_key("text") != lambda_key
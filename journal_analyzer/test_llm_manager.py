@@ -0,0 +1,133 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from journal_analyzer import llm_manager
+
+VALID = '{"answer": 42}'
+
+@pytest.fixture
+def backend(db, monkeypatch):
+    """Replaces the LLM backend with a scripted one recording every call."""
+    monkeypatch.setattr(llm_manager, 'get_active_model', lambda: 'test-model')
+    monkeypatch.setattr(llm_manager, 'get_cached_llm_response', db.get_cached_llm_response)
+    monkeypatch.setattr(llm_manager, 'cache_llm_response', db.cache_llm_response)
+    fake = SimpleNamespace(calls=[], response=VALID)
+
+    def query_backend(model, prompt, system):
+        fake.calls.append(prompt)
+        return fake.response
+    monkeypatch.setattr(llm_manager, '_query_backend', query_backend)
+    return fake
+
+def test_accepted_response_is_cached(backend):
+    validate = llm_manager.json_fields_validator(['answer'])
+    assert llm_manager.query_llm("question", validate=validate) == VALID
+    assert llm_manager.query_llm("question", validate=validate) == VALID
+    assert backend.calls == ["question"]
+
+def test_rejected_response_is_not_cached(backend):
+    validate = llm_manager.json_fields_validator(['answer'])
+    backend.response = "I can't help with that."
+    llm_manager.query_llm("question", validate=validate)
+    backend.response = '{"other": 1}'  # JSON, but missing a required field
+    llm_manager.query_llm("question", validate=validate)
+    backend.response = VALID
+    assert llm_manager.query_llm("question", validate=validate) == VALID
+    assert llm_manager.query_llm("question", validate=validate) == VALID
+    assert len(backend.calls) == 3
+
+def test_nothing_cached_without_validator(backend):
+    llm_manager.query_llm("question")
+    llm_manager.query_llm("question")
+    assert len(backend.calls) == 2
+
+def test_use_cache_false_refreshes_entry(backend):
+    validate = llm_manager.json_fields_validator()
+    llm_manager.query_llm("question", validate=validate)
+    backend.response = '{"answer": 43}'
+    assert llm_manager.query_llm("question", validate=validate, use_cache=False) == '{"answer": 43}'
+    assert llm_manager.query_llm("question", validate=validate) == '{"answer": 43}'
+    assert len(backend.calls) == 2
+
+def test_concurrent_identical_queries_share_one_call(backend, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    waiting = threading.Semaphore(0)
+
+    class WaitedFuture(Future):
+        def result(self, timeout=None):
+            waiting.release()
+            return super().result(timeout)
+    monkeypatch.setattr(llm_manager, 'Future', WaitedFuture)
+
+    def slow_backend(model, prompt, system):
+        backend.calls.append(prompt)
+        started.set()
+        release.wait(5)
+        return VALID
+    monkeypatch.setattr(llm_manager, '_query_backend', slow_backend)
+
+    with ThreadPoolExecutor(10) as executor:
+        leader = executor.submit(llm_manager.query_llm, "question")
+        assert started.wait(5)
+        followers = [executor.submit(llm_manager.query_llm, "question") for _ in range(9)]
+        # Every follower is blocked on the leader's in-flight query
+        for _ in followers:
+            assert waiting.acquire(timeout=5)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == [VALID] * 10
+    assert backend.calls == ["question"]
+    assert llm_manager._inflight == {}
+
+def test_failed_query_clears_inflight_entry(backend, monkeypatch):
+    def failing_backend(model, prompt, system):
+        raise RuntimeError("backend down")
+    monkeypatch.setattr(llm_manager, '_query_backend', failing_backend)
+    with pytest.raises(RuntimeError):
+        llm_manager.query_llm("question")
+    assert llm_manager._inflight == {}
+
+def test_parse_llm_json_response_fills_defaults_and_skips_trailing_prose():
+    response = 'Sure! {"valence": 7} and {"note": "aside"}'
+    result = llm_manager.parse_llm_json_response(response, ['valence', 'arousal'], {'arousal': 5.0})
+    assert result == {'valence': 7, 'arousal': 5.0}
+
+class _FakeBatchClient:
+    """Lambda client stand-in serving one batch and its files."""
+
+    def __init__(self, status, files, output_file_id=None, error_file_id=None):
+        batch = SimpleNamespace(status=status, errors=None,
+                                output_file_id=output_file_id, error_file_id=error_file_id)
+        self.batches = SimpleNamespace(retrieve=lambda batch_id: batch)
+        self.files = SimpleNamespace(content=lambda file_id: SimpleNamespace(content=files[file_id]))
+
+def _record(custom_id, content=None, error=None):
+    body = {"choices": [{"message": {"content": content}}]} if content else {"error": error}
+    return orjson.dumps({"custom_id": custom_id, "response": {"body": body}, "error": error})
+
+@pytest.mark.parametrize('status', ['validating', 'in_progress', 'finalizing'])
+def test_collect_batch_running(monkeypatch, status):
+    monkeypatch.setattr(llm_manager, '_lambda_client', lambda: _FakeBatchClient(status, {}))
+    assert llm_manager.collect_batch('batch') is None
+
+def test_collect_batch_reads_output_and_error_files(monkeypatch):
+    files = {'out': _record('1', VALID), 'err': _record('2', error={"message": "bad request"})}
+    client = _FakeBatchClient('completed', files, output_file_id='out', error_file_id='err')
+    monkeypatch.setattr(llm_manager, '_lambda_client', lambda: client)
+    assert llm_manager.collect_batch('batch') == {'1': VALID, '2': None}
+
+def test_collect_batch_with_only_errors(monkeypatch):
+    client = _FakeBatchClient('completed', {'err': _record('1', error={"message": "bad"})}, error_file_id='err')
+    monkeypatch.setattr(llm_manager, '_lambda_client', lambda: client)
+    assert llm_manager.collect_batch('batch') == {'1': None}
+
+@pytest.mark.parametrize('status', ['failed', 'expired', 'cancelled'])
+def test_collect_batch_terminal_failure(monkeypatch, status):
+    monkeypatch.setattr(llm_manager, '_lambda_client', lambda: _FakeBatchClient(status, {}))
+    assert llm_manager.collect_batch('batch') == {}
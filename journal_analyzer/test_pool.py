@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from journal_analyzer import pool as pool_module
+from journal_analyzer.pool import SQLiteConnectionPool
+
+def _memory_pool(size=2):
+    opened = []
+
+    def factory():
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        opened.append(conn)
+        return conn
+    return SQLiteConnectionPool(factory, size=size), opened
+
+def test_release_reuses_connection():
+    pool, opened = _memory_pool()
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(opened) == 1
+
+def test_release_rolls_back_open_transaction():
+    pool, _ = _memory_pool()
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    assert conn.in_transaction
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+def test_release_closes_connection_when_full():
+    pool, _ = _memory_pool(size=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is first
+    with pytest.raises(sqlite3.ProgrammingError):
+        second.execute("SELECT 1")
+
+def test_close_all_closes_idle_connections():
+    pool, opened = _memory_pool()
+    pool.release(pool.acquire())
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+
+def test_fork_starts_with_fresh_connections(monkeypatch):
+    pool, opened = _memory_pool()
+    parent_conn = pool.acquire()
+    pool.release(parent_conn)
+    assert pool.used
+
+    # As seen from a child process after fork()
+    monkeypatch.setattr(pool_module.os, 'getpid', lambda: -1)
+    assert not pool.used
+    child_conn = pool.acquire()
+    assert child_conn is not parent_conn
+    assert len(opened) == 2
+    assert pool.used
+
+def test_used_only_after_acquire():
+    pool, opened = _memory_pool()
+    assert not pool.used
+    pool.close_all()
+    assert not pool.used
+    assert opened == []
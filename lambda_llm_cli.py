@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 import os
 import sys
+import asyncio
 import argparse
 from pathlib import Path
+from functools import lru_cache
 from typing import Optional, List
 import textwrap
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -23,6 +25,7 @@ CHARS_PER_TOKEN = 4
 MAX_API_TOKENS = 8000     # Reduced from 800000
 MAX_CHUNK_TOKENS = 5000   # Reduced from 500000
 OVERLAP_TOKENS = 500      # Reduced from 8000
+MAX_CONCURRENT_REQUESTS = 10
 
 def create_client():
     """Create and return an OpenAI client configured for Lambda's API."""
@@ -36,6 +39,18 @@ def create_client():
         base_url="https://api.lambda.ai/v1"
     )
 
+def create_async_client():
+    """Create and return an async OpenAI client configured for Lambda's API."""
+    api_key = os.getenv("LAMBDA_API_KEY")
+    if not api_key:
+        console.print("[bold red]Error:[/bold red] LAMBDA_API_KEY not found in .env file")
+        sys.exit(1)
+        
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url="https://api.lambda.ai/v1"
+    )
+
 def list_available_models():
     """List all available models from Lambda API."""
     client = create_client()
@@ -55,9 +70,30 @@ def read_file_content(file_path: str) -> str:
         console.print(f"[bold red]Error reading file:[/bold red] {e}")
         sys.exit(1)
 
+@lru_cache(maxsize=1)
+def _encoding():
+    """BPE encoding for token counts, loaded on first estimate rather than at
+    import, since the first load may download its BPE file. None if tiktoken
+    isn't installed or the file can't be fetched."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except (ImportError, OSError):  # requests' download errors are OSErrors
+        return None
+
 def estimate_tokens(text: str) -> int:
-    """Estimate number of tokens in text based on character count."""
-    return len(text) // CHARS_PER_TOKEN
+    """Estimate number of tokens in text with a BPE tokenizer, or by character count without one."""
+    enc = _encoding()
+    if enc is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(enc.encode(text, disallowed_special=()))
+
+def estimate_tokens_batch(texts: List[str]) -> List[int]:
+    """estimate_tokens for many texts; tiktoken encodes a batch on its own thread pool."""
+    enc = _encoding()
+    if enc is None:
+        return [len(text) // CHARS_PER_TOKEN for text in texts]
+    return [len(tokens) for tokens in enc.encode_batch(texts, disallowed_special=())]
 
 def chunk_large_file(file_path: str) -> List[str]:
     """
@@ -79,7 +115,9 @@ def chunk_large_file(file_path: str) -> List[str]:
     paragraphs = content.split('\n\n')
     
     chunks = []
-    current_chunk = ""
+    # Collect pieces and join once per chunk; growing a string with +=
+    # copies it on every paragraph
+    current_parts = []
     current_size = 0
     
     for para in paragraphs:
@@ -88,25 +126,26 @@ def chunk_large_file(file_path: str) -> List[str]:
         # If adding this paragraph would exceed chunk size and we already have content
         if current_size + para_size > max_chunk_chars and current_size > 0:
             # Add current chunk to results
+            current_chunk = "".join(current_parts)
             chunks.append(current_chunk)
             
             # Calculate overlap - take last N characters
             overlap_text = current_chunk[-overlap_chars:] if len(current_chunk) > overlap_chars else current_chunk
             
             # Start new chunk with overlap
-            current_chunk = overlap_text + "\n\n" + para
-            current_size = len(current_chunk)
+            current_parts = [overlap_text, "\n\n", para]
+            current_size = len(overlap_text) + para_size
         else:
             # Add paragraph to current chunk
-            if current_chunk:
-                current_chunk += "\n\n"
+            if current_size:
+                current_parts.append("\n\n")
                 current_size += 2
-            current_chunk += para
+            current_parts.append(para)
             current_size += len(para)
     
     # Add the final chunk if not empty
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current_size:
+        chunks.append("".join(current_parts))
     
     # Log chunking info
     console.print(f"[bold yellow]Large file detected:[/bold yellow] {file_path}")
@@ -150,7 +189,7 @@ def chat_with_context(
             })
     
     # Calculate total estimated tokens for all chunks
-    total_estimated_tokens = sum(estimate_tokens(chunk["content"]) for chunk in file_chunks)
+    total_estimated_tokens = sum(estimate_tokens_batch([chunk["content"] for chunk in file_chunks]))
     
     # Warn if we're still over the limit after chunking
     if total_estimated_tokens > MAX_API_TOKENS:
@@ -158,7 +197,7 @@ def chat_with_context(
         console.print("[yellow]Processing chunks separately and combining results...[/yellow]")
         
         # Process in batches
-        process_large_context_in_batches(client, file_chunks, question, model, system_prompt)
+        process_large_context_in_batches(file_chunks, question, model, system_prompt)
         return
     
     # Add all chunks to messages
@@ -200,10 +239,39 @@ def chat_with_context(
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
 
-def process_large_context_in_batches(client, file_chunks, question, model, system_prompt):
+async def _query_batch(client, semaphore, i, total, messages, model):
+    """Send one batch request, waiting for a free slot in the semaphore."""
+    async with semaphore:
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+            )
+            
+            # Display token usage for this batch
+            console.print(f"[dim]Batch {i+1}/{total} tokens: {response.usage.total_tokens}[/dim]")
+            return response.choices[0].message.content
+            
+        except Exception as e:
+            console.print(f"[bold red]Error processing batch {i+1}:[/bold red] {e}")
+            return f"Error processing this section: {e}"
+
+async def _query_batches(batch_messages, model, concurrency):
+    """Send all batch requests concurrently, at most `concurrency` in flight."""
+    client = create_async_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    total = len(batch_messages)
+    async with client:
+        return await asyncio.gather(*[
+            _query_batch(client, semaphore, i, total, messages, model)
+            for i, messages in enumerate(batch_messages)
+        ])
+
+def process_large_context_in_batches(file_chunks, question, model, system_prompt,
+                                     concurrency: int = MAX_CONCURRENT_REQUESTS):
     """Process extremely large context by splitting into multiple API calls and combining results."""
     # Calculate how many chunks we can fit in each batch
-    tokens_per_chunk = [estimate_tokens(chunk["content"]) for chunk in file_chunks]
+    tokens_per_chunk = estimate_tokens_batch([chunk["content"] for chunk in file_chunks])
     
     batches = []
     current_batch = []
@@ -228,11 +296,9 @@ def process_large_context_in_batches(client, file_chunks, question, model, syste
     
     console.print(f"[yellow]Split into {len(batches)} API requests[/yellow]")
     
-    # Process each batch with appropriate context
-    all_responses = []
+    # Build the messages for each batch up front
+    batch_messages = []
     for i, batch in enumerate(batches):
-        console.print(f"[cyan]Processing batch {i+1}/{len(batches)}...[/cyan]")
-        
         # Create messages for this batch
         messages = [{"role": "system", "content": system_prompt}]
         
@@ -257,25 +323,12 @@ def process_large_context_in_batches(client, file_chunks, question, model, syste
             batch_question = f"This is part {i+1} of {len(batches)} of the context. {question}"
             
         messages.append({"role": "user", "content": batch_question})
-        
-        try:
-            # Call the API
-            with console.status(f"[bold green]Processing batch {i+1}/{len(batches)}...", spinner="dots"):
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                )
-            
-            # Store the response
-            answer = response.choices[0].message.content
-            all_responses.append(answer)
-            
-            # Display token usage for this batch
-            console.print(f"[dim]Batch {i+1} tokens: {response.usage.total_tokens}[/dim]")
-            
-        except Exception as e:
-            console.print(f"[bold red]Error processing batch {i+1}:[/bold red] {e}")
-            all_responses.append(f"Error processing this section: {e}")
+        batch_messages.append(messages)
+    
+    # Batches are independent, so overlap their round-trips instead of
+    # waiting on each one in turn; gather() keeps the responses in order
+    with console.status(f"[bold green]Processing {len(batches)} batches ({concurrency} at a time)...", spinner="dots"):
+        all_responses = asyncio.run(_query_batches(batch_messages, model, concurrency))
     
     # Combine and display all responses
     if len(all_responses) > 1:
@@ -6,10 +6,16 @@ from tqdm import tqdm
 import time
 from datetime import datetime
 import re
+import functools
 import argparse
 import sys
 import ollama
 
+@functools.lru_cache(maxsize=4096)
+def _term_pattern(term: str) -> re.Pattern:
+    """Compiled case-insensitive literal pattern for a term, kept for the most recent terms"""
+    return re.compile(re.escape(term), re.IGNORECASE)
+
 class OllamaClient:
     """Handles Ollama interactions - either local or remote"""
     def __init__(self, mode='local', host='localhost', port=11434):
@@ -431,11 +437,9 @@ Return only the replacement, no other text."""
 
     def create_changelog(self):
         """Generate a changelog for the current state of substitutions"""
-        changelog = ""
-        for category, items in self.substitutions.items():
-            for item, pseudonym in items.items():
-                changelog += f"Replaced {item} with {pseudonym} in {category}\n"
-        return changelog
+        return "".join(f"Replaced {item} with {pseudonym} in {category}\n"
+                       for category, items in self.substitutions.items()
+                       for item, pseudonym in items.items())
 
     def _load_existing_substitutions(self, output_dir: Path, file_stem: str) -> bool:
         """Load existing substitutions with error handling"""
@@ -625,12 +629,7 @@ Return only the replacement, no other text."""
                             for term, category in sorted_terms:
                                 if term in processed_chunk:
                                     replacement = self.get_substitution(term, category, chunk)
-                                    processed_chunk = re.sub(
-                                        re.escape(term),
-                                        replacement,
-                                        processed_chunk,
-                                        flags=re.IGNORECASE
-                                    )
+                                    processed_chunk = _term_pattern(term).sub(replacement, processed_chunk)
 
                     except Exception as e:
                         # Catch any other unexpected error during the processing of this chunk *outside* detect_identifiers
@@ -677,21 +676,15 @@ Return only the replacement, no other text."""
             # Process chunks with consistent substitution handling
             print("Applying substitutions...")
             processed_chunks = []
+            # Sort terms by length (longest first); the term set is fixed from here on
+            sorted_terms = sorted(self.identified_terms, key=lambda x: len(x[0]), reverse=True)
             for i, chunk in enumerate(tqdm(chunks, desc="Pseudonymizing text")):
                 processed_text = chunk
                 
-                # Sort terms by length (longest first)
-                sorted_terms = sorted(self.identified_terms, key=lambda x: len(x[0]), reverse=True)
-                
                 for term, category in sorted_terms:
                     if term in processed_text:
                         replacement = self.get_substitution(term, category, chunk)
-                        processed_text = re.sub(
-                            re.escape(term),
-                            replacement,
-                            processed_text,
-                            flags=re.IGNORECASE
-                        )
+                        processed_text = _term_pattern(term).sub(replacement, processed_text)
                 
                 processed_chunks.append(processed_text)
                 
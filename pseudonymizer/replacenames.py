@@ -5,6 +5,9 @@ from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Tuple, Any
 
+# Trailing comma before a closing brace or bracket, e.g. {"a": 1,}
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
 def load_mappings(mapping_file: str) -> Dict[str, Any]:
     """Load and validate mappings from JSON file."""
     try:
@@ -18,8 +21,7 @@ def load_mappings(mapping_file: str) -> Dict[str, Any]:
         with open(mapping_file, 'r', encoding='utf-8') as f:
             content = f.read()
             # Fix common JSON issues
-            content = re.sub(r',\s*}', '}', content)  # Remove trailing commas
-            content = re.sub(r',\s*]', ']', content)  # Remove trailing commas in arrays
+            content = _TRAILING_COMMA_RE.sub(r'\1', content)  # Remove trailing commas in objects and arrays
             return json.loads(content)
 
 def extract_mappings(data: Any, prefix: str = '') -> List[Tuple[str, str, str]]: